@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Local, content-addressed cache for MLflow model artifacts on the shared workdir PVC
+
+Every pipeline step that needs the trained model goes through load_sklearn_model(),
+so the artifact is downloaded from MinIO once per workflow run instead of once per step.
+
+Layout under ARTIFACT_CACHE_DIR:
+    index.json            model URI -> checksum, size, last use, verified flag
+    objects/<sha256>/     downloaded artifact directory, named by content checksum
+    stats.json            cumulative hits, misses and bytes saved
+    .lock                 flock()ed by whichever process mutates the cache
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+from contextlib import contextmanager
+
+from workspace import workspace_path
+
+CACHE_DIR_NAME = ".artifact-cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def get_cache_config():
+    """Get cache settings from environment variables"""
+    return {
+        'cache_dir': os.getenv('ARTIFACT_CACHE_DIR', workspace_path(CACHE_DIR_NAME)),
+        'max_bytes': int(os.getenv('ARTIFACT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+        'enabled': os.getenv('ARTIFACT_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    }
+
+
+def uri_key(model_uri):
+    """Stable index key for a model URI"""
+    return hashlib.sha256(model_uri.encode('utf-8')).hexdigest()
+
+
+def directory_checksum(path):
+    """SHA-256 over relative file names and contents of an artifact directory"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def directory_size(path):
+    """Total size in bytes of all files below path"""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+
+class ArtifactCache:
+    """Size-bounded, flock-protected artifact cache shared between pipeline steps"""
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        config = get_cache_config()
+        self.cache_dir = cache_dir or config['cache_dir']
+        self.max_bytes = max_bytes if max_bytes is not None else config['max_bytes']
+        self.objects_dir = os.path.join(self.cache_dir, 'objects')
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        self.stats_path = os.path.join(self.cache_dir, 'stats.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock on the cache for the duration of the block"""
+        with open(os.path.join(self.cache_dir, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_json(self, path, default):
+        if not os.path.exists(path):
+            return default
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def _write_json(self, path, data):
+        # Write-then-rename so readers never see a half-written file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _object_path(self, checksum):
+        return os.path.join(self.objects_dir, checksum)
+
+    def stats(self):
+        """Cumulative cache statistics including hit rate"""
+        stats = self._read_json(self.stats_path, {})
+        for key in ('hits', 'misses', 'bytes_saved', 'bytes_downloaded', 'evictions', 'corrupt'):
+            stats.setdefault(key, 0)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _record(self, **increments):
+        stats = self.stats()
+        for key, value in increments.items():
+            stats[key] = stats.get(key, 0) + value
+        stats.pop('hit_rate', None)
+        self._write_json(self.stats_path, stats)
+
+    def _intact(self, entry):
+        """Check a cached object before serving it
+
+        Every hit compares the on-disk size (cheap, catches truncation); the first hit after
+        an object is written also recomputes the full checksum.
+        """
+        object_path = self._object_path(entry['checksum'])
+        if not os.path.isdir(object_path) or directory_size(object_path) != entry['size']:
+            return False
+        if not entry.get('verified'):
+            if directory_checksum(object_path) != entry['checksum']:
+                return False
+            entry['verified'] = True
+        return True
+
+    def fetch(self, model_uri, download_fn):
+        """Return a local directory for model_uri, calling download_fn(dst_dir) on a miss"""
+        key = uri_key(model_uri)
+        with self._locked():
+            index = self._read_json(self.index_path, {})
+            entry = index.get(key)
+
+            if entry and not self._intact(entry):
+                print(f"⚠️ Cached artifact for {model_uri} is corrupt, downloading again")
+                shutil.rmtree(self._object_path(entry['checksum']), ignore_errors=True)
+                for stale in [k for k, e in index.items() if e['checksum'] == entry['checksum']]:
+                    del index[stale]
+                self._record(corrupt=1)
+                entry = None
+
+            if entry:
+                entry['last_used'] = time.time()
+                self._write_json(self.index_path, index)
+                self._record(hits=1, bytes_saved=entry['size'])
+                print(f"♻️ Artifact cache hit for {model_uri} ({entry['size']} bytes)")
+                return self._object_path(entry['checksum'])
+
+            print(f"⬇️ Artifact cache miss for {model_uri}, downloading...")
+            staging_dir = os.path.join(self.cache_dir, f"staging-{os.getpid()}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            os.makedirs(staging_dir)
+            try:
+                local_path = download_fn(staging_dir)
+                checksum = directory_checksum(local_path)
+                size = directory_size(local_path)
+                object_path = self._object_path(checksum)
+                if os.path.isdir(object_path):
+                    # Same content already cached under another URI
+                    shutil.rmtree(local_path, ignore_errors=True)
+                else:
+                    os.replace(local_path, object_path)
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+            index[key] = {
+                'model_uri': model_uri,
+                'checksum': checksum,
+                'size': size,
+                'last_used': time.time(),
+                'verified': False
+            }
+            evicted = self._evict(index, keep=checksum)
+            self._write_json(self.index_path, index)
+            self._record(misses=1, bytes_downloaded=size, evictions=evicted)
+            return object_path
+
+    def _evict(self, index, keep):
+        """Drop least recently used objects until the cache fits in max_bytes"""
+        objects = {}
+        for entry in index.values():
+            current = objects.setdefault(entry['checksum'], {'size': entry['size'], 'last_used': 0})
+            current['last_used'] = max(current['last_used'], entry['last_used'])
+
+        total = sum(obj['size'] for obj in objects.values())
+        evicted = 0
+        for checksum, obj in sorted(objects.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if checksum == keep:
+                continue
+            shutil.rmtree(self._object_path(checksum), ignore_errors=True)
+            for key in [k for k, entry in index.items() if entry['checksum'] == checksum]:
+                del index[key]
+            total -= obj['size']
+            evicted += 1
+            print(f"🗑️ Evicted cached artifact {checksum[:12]} ({obj['size']} bytes)")
+        return evicted
+
+
+def _mlflow_download(model_uri):
+    """Build a download function that pulls model_uri from MLflow into a directory"""
+    def download(dst_dir):
+        import mlflow.artifacts
+        return mlflow.artifacts.download_artifacts(artifact_uri=model_uri, dst_path=dst_dir)
+    return download
+
+
+def load_sklearn_model(model_uri):
+    """Load an sklearn model through the artifact cache, falling back to a direct MLflow load"""
+    import mlflow.sklearn
+
+    config = get_cache_config()
+    if not config['enabled']:
+        return mlflow.sklearn.load_model(model_uri)
+
+    try:
+        cache = ArtifactCache()
+        local_path = cache.fetch(model_uri, _mlflow_download(model_uri))
+    except OSError as e:
+        print(f"⚠️ Warning: Artifact cache unavailable ({e}), loading directly from MLflow")
+        return mlflow.sklearn.load_model(model_uri)
+
+    stats = cache.stats()
+    print(f"📦 Artifact cache: hit rate {stats['hit_rate']:.0%}, "
+          f"{stats['bytes_saved']} bytes saved over {stats['hits'] + stats['misses']} lookups")
+    return mlflow.sklearn.load_model(local_path)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Request/response capture for retraining data
+
+serve.py copies each batch's inputs and predictions into a preallocated NumPy
+ring buffer; a background thread flushes committed rows in bulk to rotating
+.npz segments that train.py can ingest (CAPTURE_SEGMENTS_DIR). The request path
+only takes a lock long enough to bump the write cursor, never touches disk, and
+drops rows instead of blocking when the buffer is full.
+
+Segment layout (one file per flush batch, oldest deleted beyond max_segments):
+    capture-<unix ms>-<host>-<pid>-<seq>.npz   X (float32 rows), predictions, timestamps, model_version
+
+All replicas of a deployment share one directory; the host and pid in the name
+keep segments (and their temp files) from replicas flushing in the same
+millisecond apart.
+"""
+
+import os
+import glob
+import socket
+import time
+import random
+import threading
+
+import numpy as np
+
+SEGMENT_PREFIX = "capture-"
+
+
+def get_capture_config():
+    """Get capture settings from environment variables"""
+    return {
+        'enabled': os.getenv('CAPTURE_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+        'segment_dir': os.getenv('CAPTURE_DIR', '/captures'),
+        'capacity': int(os.getenv('CAPTURE_CAPACITY', 65536)),
+        'sample_rate': float(os.getenv('CAPTURE_SAMPLE_RATE', 1.0)),
+        'flush_interval': float(os.getenv('CAPTURE_FLUSH_INTERVAL', 5.0)),
+        'segment_rows': int(os.getenv('CAPTURE_SEGMENT_ROWS', 10000)),
+        'max_segments': int(os.getenv('CAPTURE_MAX_SEGMENTS', 100)),
+        'model_version': os.getenv('MODEL_VERSION', 'unknown')
+    }
+
+
+class CaptureBuffer:
+    """Bounded ring buffer of (input row, prediction) pairs with a background flusher
+
+    Writers reserve a slot range under a short lock, copy their rows outside it and
+    then publish each slot by writing its sequence number into `_committed`. The
+    flusher only advances over the contiguous committed prefix, so a slow writer
+    never has its slots read half-written or overwritten.
+    """
+
+    def __init__(self, n_features, segment_dir, capacity=65536, sample_rate=1.0,
+                 flush_interval=5.0, segment_rows=10000, max_segments=100, model_version="unknown"):
+        self.n_features = n_features
+        self.segment_dir = segment_dir
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.segment_rows = segment_rows
+        self.max_segments = max_segments
+        self.model_version = model_version
+
+        self._X = np.zeros((capacity, n_features), dtype=np.float32)
+        self._predictions = np.zeros(capacity, dtype=np.int64)
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        # Sequence number + 1 of the row published in each slot (0 = never written,
+        # negative = reserved but skipped because the copy failed)
+        self._committed = np.zeros(capacity, dtype=np.int64)
+
+        self._head = 0          # next sequence number to reserve
+        self._tail = 0          # next sequence number to flush
+        self._reserve_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []      # flushed-from-ring rows waiting for a full segment
+        self._pending_rows = 0
+        self._segment_seq = 0
+        self.writer_id = f"{socket.gethostname()}-{os.getpid()}"
+
+        self._metrics = {
+            'captured_rows': 0, 'dropped_rows': 0, 'sampled_out_rows': 0,
+            'flushed_rows': 0, 'segments_written': 0, 'segments_deleted': 0, 'flush_errors': 0,
+            'failed_rows': 0
+        }
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(segment_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, n_features):
+        config = get_capture_config()
+        return cls(
+            n_features, config['segment_dir'], capacity=config['capacity'],
+            sample_rate=config['sample_rate'], flush_interval=config['flush_interval'],
+            segment_rows=config['segment_rows'], max_segments=config['max_segments'],
+            model_version=config['model_version']
+        )
+
+    def _count(self, key, n):
+        # dict item += is not atomic; metrics share the reservation lock
+        with self._reserve_lock:
+            self._metrics[key] += n
+
+    def record(self, X, predictions):
+        """Copy a batch into the ring; returns False if it was sampled out or dropped
+
+        Raises ValueError for rows that do not have n_features columns or a prediction each,
+        before any slot is reserved.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n = len(X)
+        if n == 0:
+            return False
+        if X.ndim != 2 or X.shape[1] != self.n_features or len(predictions) != n:
+            self._count('failed_rows', n)
+            raise ValueError(f"Cannot capture X of shape {X.shape} with {len(predictions)} predictions "
+                             f"({self.n_features} features expected)")
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self._count('sampled_out_rows', n)
+            return False
+
+        with self._reserve_lock:
+            start = self._head
+            if start + n - self._tail > self.capacity:
+                # Drop-on-full: never block the request path waiting for the flusher
+                self._metrics['dropped_rows'] += n
+                return False
+            self._head = start + n
+
+        sequence = np.arange(start, start + n)
+        slots = sequence % self.capacity
+        copied = False
+        try:
+            self._X[slots] = X
+            self._predictions[slots] = predictions
+            self._timestamps[slots] = time.time()
+            copied = True
+        finally:
+            # Reserved slots are always published, as skipped (negative) if the copy failed,
+            # otherwise the flusher would stop at them forever
+            self._committed[slots] = (sequence + 1) if copied else -(sequence + 1)
+            self._count('captured_rows' if copied else 'failed_rows', n)
+        return True
+
+    def _drain(self):
+        """Move the committed prefix of the ring into the pending list"""
+        tail, head = self._tail, self._head
+        if head == tail:
+            return 0
+        sequence = np.arange(tail, head)
+        slots = sequence % self.capacity
+        published = np.abs(self._committed[slots]) == sequence + 1
+        ready = len(published) if published.all() else int(np.argmin(published))
+        if ready == 0:
+            return 0
+
+        slots = slots[:ready]
+        slots = slots[self._committed[slots] > 0]
+        if len(slots):
+            self._pending.append((self._X[slots].copy(), self._predictions[slots].copy(), self._timestamps[slots].copy()))
+            self._pending_rows += len(slots)
+        with self._reserve_lock:
+            self._tail = tail + ready
+        return ready
+
+    def _write_segment(self):
+        X = np.concatenate([batch[0] for batch in self._pending])
+        predictions = np.concatenate([batch[1] for batch in self._pending])
+        timestamps = np.concatenate([batch[2] for batch in self._pending])
+
+        self._segment_seq += 1
+        name = f"{SEGMENT_PREFIX}{int(time.time() * 1000)}-{self.writer_id}-{self._segment_seq:06d}.npz"
+        path = os.path.join(self.segment_dir, name)
+        # Write-then-rename so train.py never reads a partial segment
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, X=X, predictions=predictions, timestamps=timestamps,
+                     model_version=np.array(self.model_version))
+        os.replace(tmp_path, path)
+
+        self._pending, self._pending_rows = [], 0
+        self._count('flushed_rows', len(X))
+        self._count('segments_written', 1)
+        self._rotate()
+        return path
+
+    def _rotate(self):
+        segments = list_segments(self.segment_dir)
+        for path in segments[:max(0, len(segments) - self.max_segments)]:
+            try:
+                os.remove(path)
+                self._count('segments_deleted', 1)
+            except OSError:
+                pass
+
+    def flush(self, force=False):
+        """Drain the ring and write a segment once enough rows are pending (or when forced)"""
+        with self._flush_lock:
+            try:
+                self._drain()
+                if self._pending_rows and (force or self._pending_rows >= self.segment_rows):
+                    return self._write_segment()
+            except OSError as e:
+                self._count('flush_errors', 1)
+                print(f"⚠️ Warning: Capture flush failed: {e}")
+        return None
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+            # Keep up with bursts without waiting a full interval
+            while self._head - self._tail >= self.segment_rows and not self._stop.is_set():
+                if not self.flush(force=True):
+                    break
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="capture-flusher", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the flusher and write out everything still buffered"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush(force=True)
+
+    def stats(self):
+        """Capture counters plus current buffer occupancy"""
+        with self._reserve_lock:
+            stats = dict(self._metrics)
+            stats['buffered_rows'] = self._head - self._tail
+        stats['pending_rows'] = self._pending_rows
+        stats['capacity'] = self.capacity
+        stats['sample_rate'] = self.sample_rate
+        offered = stats['captured_rows'] + stats['dropped_rows']
+        stats['drop_rate'] = round(stats['dropped_rows'] / offered, 4) if offered else 0.0
+        return stats
+
+
+def list_segments(segment_dir):
+    """Completed capture segments below segment_dir (one subdirectory per deployment), oldest first"""
+    paths = glob.glob(os.path.join(segment_dir, "**", f"{SEGMENT_PREFIX}*.npz"), recursive=True)
+    return sorted(paths, key=os.path.basename)
+
+
+def load_segments(segment_dir, max_rows=None):
+    """Load captured rows and predictions from the newest segments, up to max_rows"""
+    X_parts, y_parts, rows = [], [], 0
+    for path in reversed(list_segments(segment_dir)):
+        with np.load(path) as segment:
+            X_parts.append(segment['X'])
+            y_parts.append(segment['predictions'])
+        rows += len(X_parts[-1])
+        if max_rows is not None and rows >= max_rows:
+            break
+    if not X_parts:
+        return np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.int64)
+    X, y = np.concatenate(X_parts), np.concatenate(y_parts)
+    if max_rows is not None:
+        X, y = X[:max_rows], y[:max_rows]
+    return X, y
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Post-training compaction of the RandomForest for serving
+
+The trained forest keeps 100 full-depth sklearn trees with float64 thresholds
+and int64 node arrays. CompactForest flattens the trees into a few NumPy arrays
+with the smallest dtypes that fit (float32 thresholds, int8/int16 features and
+children), merges sibling leaves with identical class distributions and keeps
+only the smallest subset of trees whose predictions match the full forest on
+a selection set. Prediction walks all selected trees at once with vectorized
+NumPy, so serving needs neither sklearn nor joblib for the forest.
+
+Fidelity is measured on a probe set disjoint from the selection set (jittered
+rows from a different seed), so the gate is not checking the stopping
+condition of the selection. COMPACTION_TOLERANCE=0 keeps every tree and only
+changes dtypes, which is lossless.
+"""
+
+import io
+import os
+import time
+import pickle
+
+import numpy as np
+
+
+def _smallest_int_dtype(max_value, min_value=-1):
+    """Smallest signed integer dtype holding [min_value, max_value]"""
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= min_value and max_value <= info.max:
+            return dtype
+    return np.int64
+
+
+def _float32_floor(values):
+    """Largest float32 <= each value, so float32 `x <= t` splits exactly like sklearn's float64 thresholds"""
+    rounded = values.astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def _extract_tree(estimator, merge_tolerance=0.0):
+    """Flatten one fitted sklearn tree into node lists, merging redundant sibling leaves"""
+    tree = estimator.tree_
+    left, right = tree.children_left, tree.children_right
+    # Forest members are fit on encoded labels, so value columns already follow forest.classes_;
+    # normalize because sklearn stores weighted counts or fractions depending on version
+    values = tree.value[:, 0, :].astype(np.float64)
+    values = values / np.maximum(values.sum(axis=1, keepdims=True), 1e-12)
+
+    nodes = {"feature": [], "threshold": [], "left": [], "right": [], "value": []}
+
+    def build(node):
+        """Return (index, leaf_value or None) of the compacted subtree rooted at node"""
+        if left[node] == -1:
+            index = len(nodes["feature"])
+            value = values[node]
+            for key, item in (("feature", -1), ("threshold", 0.0), ("left", -1), ("right", -1), ("value", value)):
+                nodes[key].append(item)
+            return index, value
+
+        index = len(nodes["feature"])
+        for key, item in (("feature", tree.feature[node]), ("threshold", tree.threshold[node]),
+                          ("left", -1), ("right", -1), ("value", None)):
+            nodes[key].append(item)
+        left_index, left_value = build(left[node])
+        right_index, right_value = build(right[node])
+
+        # Both children are leaves predicting the same distribution: the split is redundant
+        if left_value is not None and right_value is not None \
+                and np.max(np.abs(left_value - right_value)) <= merge_tolerance:
+            merged = (left_value + right_value) / 2.0
+            for key in nodes:
+                del nodes[key][index:]
+            for key, item in (("feature", -1), ("threshold", 0.0), ("left", -1), ("right", -1), ("value", merged)):
+                nodes[key].append(item)
+            return index, merged
+
+        nodes["left"][index] = left_index
+        nodes["right"][index] = right_index
+        return index, None
+
+    build(0)
+    return nodes
+
+
+def _tree_depth(nodes):
+    depth, stack = 0, [(0, 1)]
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+        if nodes["left"][node] != -1:
+            stack.append((nodes["left"][node], level + 1))
+            stack.append((nodes["right"][node], level + 1))
+    return depth
+
+
+class CompactForest:
+    """Vectorized, dtype-compacted forest with an sklearn-like predict API"""
+
+    def __init__(self, trees, classes, n_features):
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = n_features
+        self.n_estimators = len(trees)
+
+        roots, offset = [], 0
+        feature, threshold, left, right, value = [], [], [], [], []
+        for nodes in trees:
+            roots.append(offset)
+            feature.extend(nodes["feature"])
+            threshold.extend(nodes["threshold"])
+            # Children become absolute indices into the concatenated arrays
+            left.extend(child + offset if child != -1 else -1 for child in nodes["left"])
+            right.extend(child + offset if child != -1 else -1 for child in nodes["right"])
+            value.extend(v if v is not None else np.zeros(len(classes)) for v in nodes["value"])
+            offset += len(nodes["feature"])
+
+        index_dtype = _smallest_int_dtype(offset)
+        self.roots_ = np.asarray(roots, dtype=index_dtype)
+        self.feature_ = np.asarray(feature, dtype=_smallest_int_dtype(n_features))
+        self.threshold_ = _float32_floor(np.asarray(threshold, dtype=np.float64))
+        self.left_ = np.asarray(left, dtype=index_dtype)
+        self.right_ = np.asarray(right, dtype=index_dtype)
+        self.value_ = np.asarray(value, dtype=np.float32)
+        self.max_depth_ = max((_tree_depth(nodes) for nodes in trees), default=1)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature_)
+
+    def apply(self, X):
+        """Leaf index reached in every tree, shape (n_rows, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, but CompactForest is expecting "
+                             f"{self.n_features_in_} features as input")
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots_, (X.shape[0], len(self.roots_))).astype(np.int64)
+        for _ in range(self.max_depth_):
+            left = self.left_[node]
+            internal = left != -1
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature_[node]] <= self.threshold_[node]
+            node = np.where(internal, np.where(go_left, left, self.right_[node]), node)
+        return node
+
+    def predict_proba(self, X):
+        return self.value_[self.apply(X)].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _per_tree_proba(forest, X):
+    return np.stack([tree.predict_proba(X) for tree in forest.estimators_])
+
+
+def select_trees(forest, X_select, tolerance=0.0, min_trees=1):
+    """Greedily pick the smallest tree subset whose argmax matches the full forest on X_select"""
+    per_tree = _per_tree_proba(forest, np.asarray(X_select, dtype=np.float32))
+    reference = np.argmax(per_tree.mean(axis=0), axis=1)
+    node_counts = np.array([tree.tree_.node_count for tree in forest.estimators_])
+
+    selected, total = [], np.zeros_like(per_tree[0])
+    remaining = list(range(len(per_tree)))
+    agreement = 0.0
+    while remaining:
+        # Score every candidate by agreement with the full forest; prefer smaller trees on ties
+        scores = [np.mean(np.argmax(total + per_tree[i], axis=1) == reference) for i in remaining]
+        best = max(range(len(remaining)), key=lambda k: (scores[k], -node_counts[remaining[k]]))
+        index = remaining.pop(best)
+        selected.append(index)
+        total += per_tree[index]
+        agreement = scores[best]
+        if agreement >= 1.0 - tolerance and len(selected) >= min_trees:
+            break
+    return sorted(selected), agreement
+
+
+def _pickled_size(model):
+    buffer = io.BytesIO()
+    pickle.dump(model, buffer)
+    return buffer.tell()
+
+
+def _row_latency_us(model, X, repeats=200):
+    """Median single-row predict latency in microseconds (serving traffic is mostly one row)"""
+    timings = []
+    for i in range(repeats):
+        row = X[i % len(X)].reshape(1, -1)
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e6)
+
+
+def _jittered(X, copies, noise, seed):
+    """`copies` jittered copies of X (Gaussian noise scaled by each feature's std)"""
+    rng = np.random.RandomState(seed)
+    scale = X.std(axis=0) * noise
+    return np.concatenate([X + rng.normal(0.0, 1.0, X.shape) * scale for _ in range(copies)])
+
+
+def fidelity_sets(X, augment=None, noise=None, seed=None):
+    """Disjoint (selection, probe) row sets: X plus jittered copies, and jittered copies from another seed"""
+    X = np.asarray(X, dtype=np.float64)
+    augment = int(os.getenv("COMPACTION_AUGMENT", 10)) if augment is None else augment
+    noise = float(os.getenv("COMPACTION_NOISE", 0.1)) if noise is None else noise
+    seed = int(os.getenv("COMPACTION_SEED", 1)) if seed is None else seed
+    X_select = np.concatenate([X, _jittered(X, augment, noise, seed)])
+    X_probe = _jittered(X, augment, noise, seed + 1)
+    return X_select, X_probe
+
+
+def compact_forest(forest, X_select, X_probe, tolerance=None, min_trees=None, merge_tolerance=0.0):
+    """Build a CompactForest from a fitted RandomForestClassifier and report size/latency/fidelity
+
+    Trees are selected on X_select and fidelity is measured on X_probe, which must not
+    overlap it. Selection aims for half the tolerance to leave headroom for the probe gate.
+    """
+    tolerance = float(os.getenv("COMPACTION_TOLERANCE", 0.02)) if tolerance is None else tolerance
+    min_trees = int(os.getenv("COMPACTION_MIN_TREES", 5)) if min_trees is None else min_trees
+    X_select = np.asarray(X_select, dtype=np.float32)
+    X_probe = np.asarray(X_probe, dtype=np.float32)
+
+    if tolerance <= 0:
+        selected = list(range(len(forest.estimators_)))
+        selection_fidelity = 1.0
+    else:
+        selected, selection_fidelity = select_trees(forest, X_select, tolerance / 2.0,
+                                                    min(min_trees, len(forest.estimators_)))
+    trees = [_extract_tree(forest.estimators_[i], merge_tolerance) for i in selected]
+    compact = CompactForest(trees, forest.classes_, forest.n_features_in_)
+
+    full_pred = forest.predict(X_probe)
+    compact_pred = compact.predict(X_probe)
+    report = {
+        "n_trees_before": len(forest.estimators_),
+        "n_trees_after": compact.n_estimators,
+        "n_nodes_before": int(sum(tree.tree_.node_count for tree in forest.estimators_)),
+        "n_nodes_after": compact.n_nodes,
+        "bytes_before": _pickled_size(forest),
+        "bytes_after": _pickled_size(compact),
+        "latency_us_per_row_before": round(_row_latency_us(forest, X_probe, repeats=50), 1),
+        "latency_us_per_row_after": round(_row_latency_us(compact, X_probe), 1),
+        "selection_fidelity": float(selection_fidelity),
+        "selection_rows": int(len(X_select)),
+        "fidelity": float(np.mean(full_pred == compact_pred)),
+        "max_proba_diff": float(np.max(np.abs(forest.predict_proba(X_probe) - compact.predict_proba(X_probe)))),
+        "probe_rows": int(len(X_probe)),
+        "tolerance": tolerance
+    }
+    return compact, report
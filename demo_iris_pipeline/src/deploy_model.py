@@ -1,12 +1,13 @@
+from profiling import StepProfiler
 import os
 import json
-import yaml
 from datetime import datetime
-import subprocess
+from kube_deploy import DeployEngine
+from workspace import workspace_path
 
 def load_model_metadata():
     """Load model metadata from versioning step"""
-    metadata_path = "/workspace/model_metadata.json"
+    metadata_path = workspace_path("model_metadata.json")
     
     if os.path.exists(metadata_path):
         with open(metadata_path, 'r') as f:
@@ -52,7 +53,7 @@ def generate_seldon_deployment(image_tag, model_version, metadata):
             "predictors": [
                 {
                     "name": "default",
-                    "replicas": 1,
+                    "replicas": int(os.getenv("REPLICAS", 1)),
                     "componentSpecs": [
                         {
                             "spec": {
@@ -97,7 +98,7 @@ def generate_seldon_deployment(image_tag, model_version, metadata):
                                         "name": "classifier-model-initializer",
                                         "image": "seldonio/rclone-storage-initializer:1.17.1",
                                         "args": [
-                                            "mlflow-artifacts:mlflow-artifacts/16/b3e9c966addd4b41a7409184cb0d916a/artifacts/model",  # SOURCE (update with your real path)
+                                            os.getenv("MODEL_ARTIFACT_PATH", "mlflow-artifacts:mlflow-artifacts/16/b3e9c966addd4b41a7409184cb0d916a/artifacts/model"),  # SOURCE
                                             "/mnt/models"                                   # DESTINATION
                                         ],
                                         "volumeMounts": [
@@ -158,38 +159,134 @@ def generate_seldon_deployment(image_tag, model_version, metadata):
         }
     }
     
+    # The image already bakes the model (prepare_build.py via the artifact cache), so the
+    # rclone initializer would download the same artifact a third time; it is opt-in only
+    pod_spec = seldon_deployment["spec"]["predictors"][0]["componentSpecs"][0]["spec"]
+    if os.getenv("MODEL_INITIALIZER", "none") != "rclone":
+        del pod_spec["initContainers"]
+
+    # Traffic capture for retraining: segments land on a PVC that train.py can read
+    capture_pvc = os.getenv("CAPTURE_PVC")
+    if capture_pvc:
+        container = pod_spec["containers"][0]
+        container["env"] += [
+            {"name": "CAPTURE_ENABLED", "value": "true"},
+            {"name": "CAPTURE_DIR", "value": f"/captures/{deployment_name}"},
+            {"name": "CAPTURE_SAMPLE_RATE", "value": os.getenv("CAPTURE_SAMPLE_RATE", "1.0")}
+        ]
+        container["volumeMounts"].append({"name": "capture", "mountPath": "/captures"})
+        pod_spec["volumes"].append({"name": "capture", "persistentVolumeClaim": {"claimName": capture_pvc}})
+
+    add_autoscaling(seldon_deployment)
+    
+    return seldon_deployment
+
+def add_autoscaling(seldon_deployment):
+    """Attach an HPA or KEDA spec that scales on serve.py's in-flight EWMA (AUTOSCALER=hpa|keda)"""
+    autoscaler = os.getenv("AUTOSCALER", "none").lower()
+    if autoscaler not in ("hpa", "keda"):
+        return seldon_deployment
+
+    predictor = seldon_deployment["spec"]["predictors"][0]
+    component = predictor["componentSpecs"][0]
+    min_replicas = int(os.getenv("AUTOSCALE_MIN_REPLICAS", predictor["replicas"]))
+    max_replicas = int(os.getenv("AUTOSCALE_MAX_REPLICAS", 5))
+    target_inflight = os.getenv("AUTOSCALE_TARGET_INFLIGHT", "4")
+    
+    # Prometheus scrapes serve.py's /metrics for iris_serving_inflight_ewma
+    component["metadata"] = {
+        "annotations": {
+            "prometheus.io/scrape": "true",
+            "prometheus.io/port": "8080",
+            "prometheus.io/path": "/metrics"
+        }
+    }
+    
+    if autoscaler == "hpa":
+        # Pods metric served by prometheus-adapter (custom.metrics.k8s.io)
+        component["hpaSpec"] = {
+            "minReplicas": min_replicas,
+            "maxReplicas": max_replicas,
+            "metricsv2": [
+                {
+                    "type": "Pods",
+                    "pods": {
+                        "metric": {"name": "iris_serving_inflight_ewma"},
+                        "target": {"type": "AverageValue", "averageValue": target_inflight}
+                    }
+                }
+            ]
+        }
+    else:
+        deployment_name = seldon_deployment["metadata"]["name"]
+        namespace = seldon_deployment["metadata"]["namespace"]
+        component["kedaSpec"] = {
+            "pollingInterval": int(os.getenv("AUTOSCALE_POLLING_SECONDS", 15)),
+            "minReplicaCount": min_replicas,
+            "maxReplicaCount": max_replicas,
+            "triggers": [
+                {
+                    "type": "prometheus",
+                    "metadata": {
+                        "serverAddress": os.getenv("PROMETHEUS_URL", "http://prometheus-server.monitoring.svc.cluster.local"),
+                        "metricName": "iris_serving_inflight_ewma",
+                        # Average across this deployment's pods (named <deployment>-<predictor>-...),
+                        # compared against the per-pod target
+                        "query": f'avg(iris_serving_inflight_ewma{{namespace="{namespace}",pod=~"{deployment_name}-.*"}})',
+                        "threshold": target_inflight
+                    }
+                }
+            ]
+        }
+    
     return seldon_deployment
 
-def cleanup_old_deployments(current_version, namespace="iris-demo"):
+def select_deployments_to_delete(deployments, current_version, keep=3):
+    """Names of deployments outside the retention window
+
+    Versions are ordered as semver (iris-0-10-0 is newer than iris-0-9-0). The newest
+    `keep` versions, the version being deployed and the last known good version are kept.
+    """
+    from version_index import VersionIndex
+    
+    index = VersionIndex()
+    index.add_from_deployments(deployments)
+    retained = set(index.newest(keep))
+    if current_version in index:
+        retained.add(index.get(current_version)["version"])
+    last_good = index.last_known_good()
+    if last_good:
+        retained.add(last_good)
+    
+    old_deployments = []
+    for obj in deployments:
+        # Deployments without a semver version label are left alone
+        record = index.get(obj.get("metadata", {}).get("labels", {}).get("version"))
+        if record is not None and record["version"] not in retained:
+            old_deployments.append(obj["metadata"]["name"])
+    return old_deployments
+
+def cleanup_old_deployments(current_version, namespace="iris-demo", engine=None, keep=3):
     """Clean up old deployment versions (keep last 3)"""
     try:
+        engine = engine or DeployEngine()
+        
         # Get all SeldonDeployments for this model
-        result = subprocess.run([
-            "kubectl", "get", "seldondeployments", "-n", namespace,
-            "-l", "app=iris", "-o", "jsonpath={.items[*].metadata.name}"
-        ], capture_output=True, text=True)
+        deployments = engine.list_deployments(namespace, "app=iris")
         
-        if result.returncode == 0:
-            deployments = result.stdout.strip().split()
-            
-            # Sort deployments (assuming version-based naming)
-            deployments.sort()
-            
-            # Keep only the last 3 versions, delete older ones
-            if len(deployments) > 3:
-                old_deployments = deployments[:-3]
-                for old_deployment in old_deployments:
-                    print(f"🗑️ Cleaning up old deployment: {old_deployment}")
-                    subprocess.run([
-                        "kubectl", "delete", "seldondeployment", old_deployment, "-n", namespace
-                    ])
+        # Keep the newest versions by semver order, delete older ones concurrently
+        old_deployments = select_deployments_to_delete(deployments, current_version, keep)
+        for old_deployment in old_deployments:
+            print(f"🗑️ Cleaning up old deployment: {old_deployment}")
+        engine.delete_many(namespace, old_deployments)
                     
     except Exception as e:
         print(f"⚠️ Warning: Could not clean up old deployments: {e}")
 
 def save_deployment_manifest(seldon_deployment):
-    """Save the deployment manifest for kubectl apply"""
-    output_path = "/workspace/seldon.yaml"
+    """Save the deployment manifest as a workflow artifact (and for manual kubectl apply)"""
+    import yaml
+    output_path = workspace_path("seldon.yaml")
     
     with open(output_path, 'w') as f:
         yaml.dump(seldon_deployment, f, default_flow_style=False)
@@ -204,6 +301,7 @@ def deploy_model():
     namespace = os.environ.get('NAMESPACE', 'iris-demo')
     
     print(f"🚀 Deploying {image_tag} version {model_version} to {namespace}")
+    profiler = StepProfiler("deploy").start()
     
     try:
         # Load model metadata
@@ -211,45 +309,49 @@ def deploy_model():
         print(f"📊 Model Accuracy: {metadata.get('performance_metrics', {}).get('accuracy', 'unknown')}")
         
         # Generate deployment manifest
-        seldon_deployment = generate_seldon_deployment(image_tag, model_version, metadata)
+        with profiler.phase("generate_manifest"):
+            seldon_deployment = generate_seldon_deployment(image_tag, model_version, metadata)
+            
+            # Save manifest
+            save_deployment_manifest(seldon_deployment)
         
-        # Save manifest
-        manifest_path = save_deployment_manifest(seldon_deployment)
+        # Off-cluster runs (local_runner.py) stop at the generated manifest
+        if os.getenv("DEPLOY_DRY_RUN", "false").lower() in ("1", "true", "yes"):
+            print("🧪 DEPLOY_DRY_RUN set - manifest generated, skipping apply")
+            return
         
-        # Apply deployment
+        # Apply deployment over a single API connection (no kubectl subprocesses)
         print("🎯 Applying SeldonDeployment...")
+        engine = DeployEngine()
+        deployment_name = seldon_deployment["metadata"]["name"]
+        deployment_namespace = seldon_deployment["metadata"]["namespace"]
         
-        result = subprocess.run([
-            "kubectl", "apply", "-f", manifest_path
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
+        with profiler.phase("apply"):
+            applied, _ = engine.apply(seldon_deployment)
+        if applied:
             print("✅ SeldonDeployment applied successfully!")
-            print(result.stdout)
-            
-            # Clean up old deployments
-            cleanup_old_deployments(model_version)
-            
-            # Wait for deployment to be ready
-            deployment_name = f"iris-{model_version.replace('.', '-')}"
-            print(f"⏳ Waiting for deployment {deployment_name} to be ready...")
-            
-            subprocess.run([
-                "kubectl", "wait", "--for=condition=Ready", 
-                f"seldondeployment/{deployment_name}",
-                "-n", os.getenv("NAMESPACE", "iris-demo"),
-                "--timeout=300s"
-            ])
-            
-            print(f"🎉 Model v{model_version} deployed successfully!")
-            
-        else:
-            print(f"❌ Deployment failed: {result.stderr}")
-            exit(1)
-            
+        
+        # Clean up old deployments
+        with profiler.phase("cleanup"):
+            cleanup_old_deployments(model_version, deployment_namespace, engine)
+        
+        # Wait for deployment to be ready
+        print(f"⏳ Waiting for deployment {deployment_name} to be ready...")
+        
+        with profiler.phase("wait_ready"):
+            ready = engine.wait_ready(deployment_namespace, deployment_name, timeout=300)
+        
+        if not ready:
+            # Fail the step so the workflow does not carry on with a broken rollout
+            raise RuntimeError(f"Deployment {deployment_name} not ready after 300s")
+        print(f"🎉 Model v{model_version} deployed successfully!")
+        
     except Exception as e:
         print(f"❌ Deployment failed: {str(e)}")
         exit(1)
+    finally:
+        profiler.stop()
+        profiler.log_to_mlflow()
 
 if __name__ == "__main__":
     deploy_model()
\ No newline at end of file
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Knowledge distillation of the RandomForest into a cheap student model
+
+The student is fit on the forest's soft labels (predict_proba) over the
+training rows plus jittered copies of them, so it learns the teacher's decision
+surface rather than just the hard training labels:
+
+    tree       one shallow DecisionTreeRegressor on the class probabilities
+    logistic   multinomial LogisticRegression, soft labels as sample weights
+
+DistilledClassifier keeps only NumPy arrays (node arrays or the coefficient
+matrix), so predicting one row costs a handful of array operations instead
+of walking 100 trees, and serving needs neither sklearn nor joblib for it.
+"""
+
+import os
+
+import numpy as np
+
+STUDENT_KINDS = ("tree", "logistic")
+
+
+def get_distill_config():
+    """Get distillation settings from environment variables"""
+    return {
+        'kind': os.getenv('DISTILL_STUDENT', '').lower(),
+        'max_depth': int(os.getenv('DISTILL_MAX_DEPTH', 4)),
+        'augment': int(os.getenv('DISTILL_AUGMENT', 10)),
+        'noise': float(os.getenv('DISTILL_NOISE', 0.1)),
+        'seed': int(os.getenv('DISTILL_SEED', 42))
+    }
+
+
+class DistilledClassifier:
+    """NumPy-only student with an sklearn-like predict API"""
+
+    def __init__(self, kind, classes, n_features):
+        if kind not in STUDENT_KINDS:
+            raise ValueError(f"Unknown student kind {kind!r}, expected one of {STUDENT_KINDS}")
+        self.kind = kind
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = n_features
+
+    @classmethod
+    def from_tree(cls, regressor, classes):
+        """Student from a fitted multi-output DecisionTreeRegressor over class probabilities"""
+        student = cls("tree", classes, regressor.n_features_in_)
+        tree = regressor.tree_
+        student.feature_ = tree.feature.astype(np.int8 if regressor.n_features_in_ < 128 else np.int32)
+        student.threshold_ = tree.threshold.astype(np.float64)
+        student.left_ = tree.children_left.astype(np.int32)
+        student.right_ = tree.children_right.astype(np.int32)
+        value = tree.value[:, :, 0].astype(np.float32)
+        student.value_ = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+        student.max_depth_ = int(tree.max_depth)
+        return student
+
+    @classmethod
+    def from_logistic(cls, model):
+        """Student from a fitted multinomial LogisticRegression"""
+        student = cls("logistic", model.classes_, model.n_features_in_)
+        student.coef_ = model.coef_.astype(np.float64)
+        student.intercept_ = model.intercept_.astype(np.float64)
+        return student
+
+    def _tree_proba(self, X):
+        # sklearn compares float32 inputs against float64 thresholds
+        X = X.astype(np.float32)
+        if len(X) == 1:
+            # One-row requests: a scalar walk beats per-level array operations
+            row, node = X[0], 0
+            while self.left_[node] != -1:
+                node = self.left_[node] if row[self.feature_[node]] <= self.threshold_[node] else self.right_[node]
+            return self.value_[node:node + 1]
+        node = np.zeros(len(X), dtype=np.int64)
+        rows = np.arange(len(X))
+        for _ in range(self.max_depth_):
+            left = self.left_[node]
+            internal = left != -1
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature_[node]] <= self.threshold_[node]
+            node = np.where(internal, np.where(go_left, left, self.right_[node]), node)
+        return self.value_[node]
+
+    def _logistic_proba(self, X):
+        scores = X @ self.coef_.T + self.intercept_
+        scores -= scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, but DistilledClassifier is expecting "
+                             f"{self.n_features_in_} features as input")
+        return self._tree_proba(X) if self.kind == "tree" else self._logistic_proba(X)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def transfer_set(X, augment=10, noise=0.1, seed=42):
+    """Training rows plus `augment` jittered copies (Gaussian noise scaled by each feature's std)"""
+    X = np.asarray(X, dtype=np.float64)
+    rng = np.random.RandomState(seed)
+    scale = X.std(axis=0) * noise
+    copies = [X] + [X + rng.normal(0.0, 1.0, X.shape) * scale for _ in range(augment)]
+    return np.concatenate(copies)
+
+
+def distill(teacher, X, kind="tree", max_depth=4, augment=10, noise=0.1, seed=42):
+    """Fit a DistilledClassifier on the teacher's soft labels over an augmented transfer set"""
+    X_transfer = transfer_set(X, augment, noise, seed)
+    soft_labels = teacher.predict_proba(X_transfer)
+
+    if kind == "tree":
+        from sklearn.tree import DecisionTreeRegressor
+        regressor = DecisionTreeRegressor(max_depth=max_depth, random_state=seed)
+        regressor.fit(X_transfer, soft_labels)
+        return DistilledClassifier.from_tree(regressor, teacher.classes_)
+
+    if kind == "logistic":
+        from sklearn.linear_model import LogisticRegression
+        # Soft labels as weights: each row appears once per class, weighted by its probability
+        n_classes = len(teacher.classes_)
+        X_expanded = np.repeat(X_transfer, n_classes, axis=0)
+        y_expanded = np.tile(teacher.classes_, len(X_transfer))
+        weights = soft_labels.reshape(-1)
+        keep = weights > 0
+        model = LogisticRegression(max_iter=1000, C=10.0)
+        model.fit(X_expanded[keep], y_expanded[keep], sample_weight=weights[keep])
+        return DistilledClassifier.from_logistic(model)
+
+    raise ValueError(f"Unknown student kind {kind!r}, expected one of {STUDENT_KINDS}")
+
+
+def agreement(teacher, student, X):
+    """Fraction of rows where the student predicts the teacher's class"""
+    return float(np.mean(teacher.predict(X) == student.predict(X)))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the iris pipeline steps
+
+    python iris_pipeline.py {train,validate,version,build,deploy,monitor,serve,local}
+
+Each subcommand imports only its own step module, and the step modules defer
+mlflow/sklearn/numpy imports to the functions that use them, so e.g. `version`
+never loads sklearn and `serve` never loads mlflow.
+"""
+
+import profiling  # noqa: F401 - imported first so step profiles include import time
+import sys
+import argparse
+import importlib
+
+# subcommand -> (module, function, description)
+COMMANDS = {
+    "train": ("train", "main", "Train the classifier and register it in MLflow"),
+    "validate": ("test_model", "main", "Validate the trained model against quality gates"),
+    "version": ("version_model", "main", "Compute the semantic version for the validated model"),
+    "build": ("prepare_build", "prepare_model_for_build", "Prepare the model for the container build"),
+    "deploy": ("deploy_model", "deploy_model", "Deploy the model as a SeldonDeployment"),
+    "monitor": ("monitor_model", "main", "Push pipeline metrics to the Prometheus Pushgateway"),
+    "serve": ("serve", "main", "Run the FastAPI prediction server"),
+    "local": ("local_runner", "main", "Run the whole pipeline off-cluster with local stand-ins"),
+}
+
+# Subcommands that take their own options (everything after the subcommand is passed through)
+PASSTHROUGH = {"local"}
+
+
+def load_command(name):
+    """Import the step module for a subcommand and return its entry function"""
+    module_name, func_name, _ = COMMANDS[name]
+    module = importlib.import_module(module_name)
+    return getattr(module, func_name)
+
+
+def build_parser():
+    """Build the argument parser with one subcommand per pipeline step"""
+    parser = argparse.ArgumentParser(
+        prog="iris_pipeline",
+        description="Iris MLOps pipeline steps"
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    subparsers.required = True
+    for name, (_, _, description) in COMMANDS.items():
+        subparsers.add_parser(name, help=description, description=description, add_help=name not in PASSTHROUGH)
+    return parser
+
+
+def main(argv=None):
+    """Parse the subcommand and run the matching step"""
+    parser = build_parser()
+    args, options = parser.parse_known_args(argv)
+    if args.command in PASSTHROUGH:
+        return load_command(args.command)(options)
+    if options:
+        parser.error(f"unrecognized arguments: {' '.join(options)}")
+    return load_command(args.command)()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+In-process Kubernetes deploy engine for SeldonDeployments
+
+Replaces the kubectl subprocess calls in deploy_model.py with a single pooled HTTP
+session against the API server:
+- server-side apply, skipped when the manifest hash matches the live object
+- concurrent deletes of old deployments
+- readiness tracked through a watch stream instead of polling
+
+The API endpoint comes from K8S_API_URL (e.g. `kubectl proxy` or a local fake API
+server) or from the in-cluster service account.
+"""
+
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+SELDON_GROUP = "machinelearning.seldon.io"
+SELDON_VERSION = "v1"
+SELDON_PLURAL = "seldondeployments"
+FIELD_MANAGER = "iris-deploy"
+MANIFEST_HASH_ANNOTATION = "iris.mlops/manifest-hash"
+
+SERVICE_ACCOUNT_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+
+
+class KubeApiError(Exception):
+    """Raised when the Kubernetes API returns an error status"""
+
+    def __init__(self, status, message):
+        super().__init__(f"Kubernetes API error {status}: {message}")
+        self.status = status
+
+
+def load_api_config():
+    """Resolve API server URL and credentials from the environment"""
+    api_url = os.getenv("K8S_API_URL")
+    if api_url:
+        return {
+            "base_url": api_url.rstrip("/"),
+            "token": os.getenv("K8S_API_TOKEN"),
+            "verify": os.getenv("K8S_API_CA_FILE", True)
+        }
+
+    host = os.getenv("KUBERNETES_SERVICE_HOST")
+    port = os.getenv("KUBERNETES_SERVICE_PORT", "443")
+    if not host:
+        raise RuntimeError("No Kubernetes API configured: set K8S_API_URL or run in-cluster")
+
+    with open(os.path.join(SERVICE_ACCOUNT_DIR, "token"), "r") as f:
+        token = f.read().strip()
+    return {
+        "base_url": f"https://{host}:{port}",
+        "token": token,
+        "verify": os.path.join(SERVICE_ACCOUNT_DIR, "ca.crt")
+    }
+
+
+class KubeClient:
+    """Minimal SeldonDeployment client sharing one connection pool for all calls"""
+
+    def __init__(self, base_url, token=None, verify=True, pool_size=8):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.session.verify = verify
+        self.session.mount(base_url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    @classmethod
+    def from_env(cls):
+        return cls(**load_api_config())
+
+    def _path(self, namespace, name=None):
+        path = f"{self.base_url}/apis/{SELDON_GROUP}/{SELDON_VERSION}/namespaces/{namespace}/{SELDON_PLURAL}"
+        return f"{path}/{name}" if name else path
+
+    def _request(self, method, url, **kwargs):
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code >= 400:
+            raise KubeApiError(response.status_code, response.text[:500])
+        return response
+
+    def get(self, namespace, name):
+        """Fetch one SeldonDeployment, or None if it does not exist"""
+        try:
+            return self._request("GET", self._path(namespace, name), timeout=30).json()
+        except KubeApiError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def list(self, namespace, label_selector=None):
+        """List SeldonDeployments in a namespace"""
+        params = {"labelSelector": label_selector} if label_selector else None
+        return self._request("GET", self._path(namespace), params=params, timeout=30).json().get("items", [])
+
+    def apply(self, manifest):
+        """Server-side apply a manifest and return the live object"""
+        metadata = manifest["metadata"]
+        return self._request(
+            "PATCH",
+            self._path(metadata["namespace"], metadata["name"]),
+            params={"fieldManager": FIELD_MANAGER, "force": "true"},
+            headers={"Content-Type": "application/apply-patch+yaml"},
+            # JSON is valid YAML, so no yaml dependency is needed here
+            data=json.dumps(manifest),
+            timeout=30
+        ).json()
+
+    def delete(self, namespace, name):
+        """Delete a SeldonDeployment; returns False if it was already gone"""
+        try:
+            self._request("DELETE", self._path(namespace, name), timeout=30)
+            return True
+        except KubeApiError as e:
+            if e.status == 404:
+                return False
+            raise
+
+    def watch(self, namespace, name, resource_version, timeout_seconds):
+        """Yield watch events for a single SeldonDeployment"""
+        response = self._request(
+            "GET",
+            self._path(namespace),
+            params={
+                "watch": "true",
+                "fieldSelector": f"metadata.name={name}",
+                "resourceVersion": resource_version,
+                "timeoutSeconds": int(timeout_seconds)
+            },
+            stream=True,
+            timeout=(10, timeout_seconds + 10)
+        )
+        with response:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+
+def manifest_hash(manifest):
+    """Stable hash of a manifest, ignoring the hash annotation itself"""
+    stripped = json.loads(json.dumps(manifest))
+    stripped.get("metadata", {}).get("annotations", {}).pop(MANIFEST_HASH_ANNOTATION, None)
+    return hashlib.sha256(json.dumps(stripped, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def is_ready(obj):
+    """Whether a SeldonDeployment reports itself ready"""
+    status = (obj or {}).get("status", {})
+    if status.get("state") == "Available":
+        return True
+    return any(
+        condition.get("type") == "Ready" and condition.get("status") == "True"
+        for condition in status.get("conditions", [])
+    )
+
+
+class DeployEngine:
+    """Apply, clean up and wait for SeldonDeployments over one API client"""
+
+    def __init__(self, client=None, max_workers=4):
+        self.client = client or KubeClient.from_env()
+        self.max_workers = max_workers
+
+    def apply(self, manifest):
+        """Apply a manifest unless the live object already carries the same hash
+
+        Returns (applied, live_object).
+        """
+        metadata = manifest["metadata"]
+        digest = manifest_hash(manifest)
+        metadata.setdefault("annotations", {})[MANIFEST_HASH_ANNOTATION] = digest
+
+        live = self.client.get(metadata["namespace"], metadata["name"])
+        live_digest = ((live or {}).get("metadata", {}).get("annotations") or {}).get(MANIFEST_HASH_ANNOTATION)
+        if live_digest == digest:
+            print(f"⏭️ {metadata['name']} is unchanged (hash {digest[:12]}), skipping apply")
+            return False, live
+
+        return True, self.client.apply(manifest)
+
+    def list_deployments(self, namespace, label_selector):
+        """SeldonDeployment objects matching a label selector"""
+        return self.client.list(namespace, label_selector)
+
+    def delete_many(self, namespace, names):
+        """Delete deployments concurrently; returns the names that were deleted"""
+        if not names:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+            results = list(executor.map(lambda name: self.client.delete(namespace, name), names))
+        return [name for name, deleted in zip(names, results) if deleted]
+
+    def wait_ready(self, namespace, name, timeout=300):
+        """Block until the deployment is ready, following a watch stream; returns True on success"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            obj = self.client.get(namespace, name)
+            if is_ready(obj):
+                return True
+            resource_version = (obj or {}).get("metadata", {}).get("resourceVersion", "0")
+
+            # The watch ends on server timeout or when the resource version expires (410); re-sync then
+            for event in self.client.watch(namespace, name, resource_version, max(1, remaining)):
+                if event.get("type") == "ERROR":
+                    break
+                if event.get("type") == "DELETED":
+                    raise RuntimeError(f"SeldonDeployment {name} was deleted while waiting")
+                if is_ready(event.get("object")):
+                    return True
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Local DAG runner for the iris pipeline
+
+Runs the same step graph as the Argo workflow off-cluster:
+
+    train -> validate -> version -> monitor-validate
+                                 -> build -> deploy -> monitor-deploy
+
+Independent steps run concurrently, and steps whose inputs (step code, upstream
+outputs, data and parameters) are unchanged are restored from a local cache
+instead of re-running. Cluster services are replaced by local stand-ins:
+
+- MLflow tracking + registry: file-backed store under the state directory
+- Pushgateway: an in-process HTTP sink
+- Kubernetes: DEPLOY_DRY_RUN (the SeldonDeployment manifest is generated only)
+- Kaniko: the build step prepares the model directory but does not build an image
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _read(workspace, name, default=""):
+    path = os.path.join(workspace, name)
+    if not os.path.exists(path):
+        return default
+    with open(path, "r") as f:
+        return f.read().strip()
+
+
+def _version_env(workspace):
+    """Step env that depends on the versioning step's outputs"""
+    return {
+        "MODEL_VERSION": _read(workspace, "model_version.txt", "0.1.0"),
+        "IMAGE_TAG": _read(workspace, "version_tag.txt", "v0.1.0")
+    }
+
+
+# Step graph mirroring k8s/applications/iris-demo/base/workflow.yaml.
+# code: source files hashed into the cache key; params: env vars hashed into the key;
+# data: env vars naming paths whose contents are hashed into the key;
+# outputs: workspace paths cached and restored; cache=False for side-effect-only steps;
+# reuse_if: extra check a cache entry must pass before it is restored.
+STEPS = {
+    "train": {
+        "command": "train",
+        "deps": [],
+        "code": ["train.py", "mlflow_registry.py", "capture.py", "distill.py", "profiling.py",
+                 "workspace.py"],
+        "params": ["N_ESTIMATORS", "CAPTURE_SEGMENTS_DIR", "CAPTURE_MAX_ROWS", "DISTILL_STUDENT",
+                   "DISTILL_MAX_DEPTH", "DISTILL_AUGMENT", "DISTILL_NOISE", "DISTILL_SEED"],
+        "data": ["CAPTURE_SEGMENTS_DIR"],
+        "outputs": ["model_info.json"],
+        # Training registers model versions: a cached result only stands while the registry still
+        # serves exactly what that run registered
+        "reuse_if": lambda runner, entry_dir: registry_unchanged(runner.tracking_uri, entry_dir)
+    },
+    "validate": {
+        "command": "validate",
+        "deps": ["train"],
+        "code": ["test_model.py", "artifact_cache.py", "distill.py", "profiling.py", "workspace.py"],
+        "params": ["STUDENT_MIN_AGREEMENT"],
+        "outputs": ["validation_results.json"],
+        "env": lambda ws: {"OUTPUT_PATH": os.path.join(ws, "validation_results.json")}
+    },
+    "version": {
+        "command": "version",
+        "deps": ["validate"],
+        "code": ["version_model.py", "version_index.py", "profiling.py", "workspace.py"],
+        "params": [],
+        "outputs": ["model_version.txt", "version_tag.txt", "model_metadata.json"],
+        "env": lambda ws: {
+            "VALIDATION_RESULTS_PATH": os.path.join(ws, "validation_results.json"),
+            "OUTPUT_PATH": os.path.join(ws, "model_version.txt"),
+            "VERSION_TAG_PATH": os.path.join(ws, "version_tag.txt")
+        }
+    },
+    "monitor-validate": {
+        "command": "monitor",
+        "deps": ["version"],
+        "cache": False,
+        "env": lambda ws: dict(_version_env(ws), PIPELINE_STAGE="validate",
+                               VALIDATION_RESULTS_PATH=os.path.join(ws, "validation_results.json"))
+    },
+    "build": {
+        "command": "build",
+        "deps": ["version"],
+        "code": ["prepare_build.py", "compact_forest.py", "distill.py", "test_model.py", "artifact_cache.py",
+                 "profiling.py", "workspace.py"],
+        "params": ["COMPACT_MODEL", "COMPACTION_TOLERANCE", "COMPACTION_MIN_TREES",
+                   "COMPACTION_AUGMENT", "COMPACTION_NOISE", "COMPACTION_SEED"],
+        # prepare_build adds the compaction report to model_info.json
+        "outputs": ["model", "model_info.json"]
+    },
+    "deploy": {
+        "command": "deploy",
+        "deps": ["build"],
+        "cache": False,
+        "env": lambda ws: dict(_version_env(ws), DEPLOY_DRY_RUN="true")
+    },
+    "monitor-deploy": {
+        "command": "monitor",
+        "deps": ["deploy"],
+        "cache": False,
+        "env": lambda ws: dict(_version_env(ws), PIPELINE_STAGE="deploy",
+                               VALIDATION_RESULTS_PATH=os.path.join(ws, "validation_results.json"))
+    }
+}
+
+
+class _PushgatewaySink(BaseHTTPRequestHandler):
+    """Accepts Pushgateway pushes/deletes and records how many it received"""
+
+    pushes = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _accept(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        type(self).pushes += 1
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_POST = do_PUT = do_DELETE = _accept
+
+    def do_GET(self):
+        body = b'{"status":"success","data":[]}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _hash_path(path, digest):
+    """Feed a file or directory (names and contents) into a digest"""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+                _hash_path(file_path, digest)
+    elif os.path.exists(path):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    else:
+        digest.update(b"<missing>")
+
+
+def registry_unchanged(tracking_uri, entry_dir):
+    """Whether every model version in a cached model_info.json is still the Production version"""
+    model_info_path = os.path.join(entry_dir, "model_info.json")
+    if not os.path.exists(model_info_path):
+        return False
+    with open(model_info_path, "r") as f:
+        model_info = json.load(f)
+
+    import mlflow_registry as registry
+    from mlflow.exceptions import MlflowException
+    for info in (model_info, model_info.get("student")):
+        if not info:
+            continue
+        try:
+            current = registry.find_production_version(info["model_name"], tracking_uri)
+        except MlflowException:
+            return False
+        if current is None or str(current.version) != str(info["model_version"]) \
+                or current.run_id != model_info["run_id"]:
+            return False
+    return True
+
+
+def data_fingerprint():
+    """Identify the training data: iris ships with scikit-learn, so its version stands in for the data"""
+    from importlib import metadata
+    try:
+        return f"scikit-learn=={metadata.version('scikit-learn')}"
+    except metadata.PackageNotFoundError:
+        return "scikit-learn==unknown"
+
+
+class LocalRunner:
+    """Schedules the step graph on a thread pool and memoizes step outputs"""
+
+    def __init__(self, state_dir, use_cache=True, max_workers=4, steps=None):
+        self.state_dir = os.path.abspath(state_dir)
+        self.workspace = os.path.join(self.state_dir, "workspace")
+        self.cache_dir = os.path.join(self.state_dir, "cache")
+        self.log_dir = os.path.join(self.state_dir, "logs")
+        self.tracking_uri = "file://" + os.path.join(self.state_dir, "mlruns")
+        self.use_cache = use_cache
+        self.max_workers = max_workers
+        self.steps = steps or STEPS
+        self.output_hashes = {}
+        self.results = {}
+        for directory in (self.workspace, self.cache_dir, self.log_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def base_env(self, pushgateway_url):
+        env = dict(os.environ)
+        env.update({
+            "WORKSPACE_DIR": self.workspace,
+            "OUTPUT_DIR": self.workspace,
+            "MLFLOW_TRACKING_URI": self.tracking_uri,
+            "PUSHGATEWAY_URL": pushgateway_url,
+            "NAMESPACE": "local",
+            "GIT_PYTHON_REFRESH": "quiet",
+            "PYTHONUNBUFFERED": "1"
+        })
+        return env
+
+    def cache_key(self, name):
+        """Hash of everything a step's outputs depend on"""
+        step = self.steps[name]
+        digest = hashlib.sha256(name.encode("utf-8"))
+        for code_file in step.get("code", []) + ["iris_pipeline.py"]:
+            digest.update(code_file.encode("utf-8"))
+            _hash_path(os.path.join(SRC_DIR, code_file), digest)
+        for param in step.get("params", []):
+            digest.update(f"{param}={os.getenv(param, '')}".encode("utf-8"))
+        for data_var in step.get("data", []):
+            if os.getenv(data_var):
+                _hash_path(os.getenv(data_var), digest)
+        for dep in step["deps"]:
+            digest.update(f"{dep}:{self.output_hashes.get(dep, '')}".encode("utf-8"))
+        digest.update(data_fingerprint().encode("utf-8"))
+        return digest.hexdigest()
+
+    def _hash_outputs(self, name):
+        digest = hashlib.sha256()
+        for output in self.steps[name].get("outputs", []):
+            digest.update(output.encode("utf-8"))
+            _hash_path(os.path.join(self.workspace, output), digest)
+        return digest.hexdigest()
+
+    def _copy(self, src_root, dst_root, outputs):
+        for output in outputs:
+            src, dst = os.path.join(src_root, output), os.path.join(dst_root, output)
+            if os.path.isdir(dst):
+                shutil.rmtree(dst)
+            if os.path.isdir(src):
+                shutil.copytree(src, dst)
+            else:
+                shutil.copy2(src, dst)
+
+    def run_step(self, name, env):
+        """Run (or restore) one step; returns a result dict"""
+        step = self.steps[name]
+        cacheable = self.use_cache and step.get("cache", True)
+        key = self.cache_key(name) if step.get("cache", True) else None
+        entry_dir = os.path.join(self.cache_dir, name, key) if key else None
+        started = time.perf_counter()
+
+        if cacheable and os.path.exists(os.path.join(entry_dir, "done")) \
+                and step.get("reuse_if", lambda runner, path: True)(self, entry_dir):
+            self._copy(entry_dir, self.workspace, step.get("outputs", []))
+            return {"step": name, "status": "cached", "seconds": time.perf_counter() - started, "key": key}
+
+        step_env = dict(env)
+        if "env" in step:
+            step_env.update(step["env"](self.workspace))
+
+        log_path = os.path.join(self.log_dir, f"{name}.log")
+        with open(log_path, "w") as log:
+            result = subprocess.run(
+                [sys.executable, os.path.join(SRC_DIR, "iris_pipeline.py"), step["command"]],
+                cwd=self.workspace, env=step_env, stdout=log, stderr=subprocess.STDOUT
+            )
+        status = "ran" if result.returncode == 0 else "failed"
+
+        if status == "ran" and key:
+            # Populate the cache entry atomically: copy to a temp dir, then rename
+            tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            self._copy(self.workspace, tmp_dir, step.get("outputs", []))
+            open(os.path.join(tmp_dir, "done"), "w").close()
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+
+        return {"step": name, "status": status, "seconds": time.perf_counter() - started,
+                "key": key, "log": log_path}
+
+    def run(self):
+        """Run the whole graph; returns True if every step succeeded"""
+        sink = ThreadingHTTPServer(("127.0.0.1", 0), _PushgatewaySink)
+        threading.Thread(target=sink.serve_forever, daemon=True).start()
+        env = self.base_env(f"http://127.0.0.1:{sink.server_port}")
+
+        pending = dict(self.steps)
+        running = {}
+        failed = False
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                if not failed:
+                    for name in [n for n, s in pending.items() if all(d in self.results for d in s["deps"])]:
+                        print(f"▶️ {name}")
+                        running[executor.submit(self.run_step, name, env)] = name
+                        del pending[name]
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    self.results[name] = result
+                    if result["status"] == "failed":
+                        failed = True
+                        print(f"❌ {name} failed after {result['seconds']:.2f}s - see {result['log']}")
+                    else:
+                        self.output_hashes[name] = self._hash_outputs(name)
+                        icon = "♻️" if result["status"] == "cached" else "✅"
+                        print(f"{icon} {name} {result['status']} in {result['seconds']:.2f}s")
+
+        sink.shutdown()
+        total = time.perf_counter() - started
+        summary = {
+            "total_seconds": round(total, 3),
+            "succeeded": not failed and not pending,
+            "pushgateway_requests": _PushgatewaySink.pushes,
+            "steps": list(self.results.values())
+        }
+        with open(os.path.join(self.state_dir, "run_summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+
+        print(f"\n{'🎉' if summary['succeeded'] else '❌'} Local pipeline finished in {total:.2f}s")
+        for result in self.results.values():
+            print(f"   {result['step']:<17} {result['status']:<7} {result['seconds']:7.2f}s")
+        if pending:
+            print(f"   skipped: {', '.join(pending)}")
+        return summary["succeeded"]
+
+
+def main(argv=None):
+    """Run the pipeline locally"""
+    parser = argparse.ArgumentParser(prog="iris_pipeline local", description="Run the iris pipeline off-cluster")
+    parser.add_argument("--state-dir", default=os.getenv("LOCAL_PIPELINE_DIR", ".local-pipeline"),
+                        help="Directory for the workspace, MLflow store, step cache and logs")
+    parser.add_argument("--no-cache", action="store_true", help="Re-run every step even if its inputs are unchanged")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum number of steps running at once")
+    args = parser.parse_args(argv)
+
+    runner = LocalRunner(args.state_dir, use_cache=not args.no_cache, max_workers=args.workers)
+    if not runner.run():
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+MLflow tracking/registry helpers shared by the training and registration scripts
+
+- One MlflowClient per process, so every call reuses MLflow's pooled HTTP session
+- Params and metrics go out in a single log_batch request
+- Registration is idempotent: exactly one model version per (model name, run)
+- Independent calls and artifact uploads run concurrently on a small thread pool
+"""
+
+import os
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+# MLflow's REST session keeps a connection pool of 10; stay below it
+MAX_WORKERS = int(os.getenv("MLFLOW_MAX_WORKERS", 4))
+
+
+@lru_cache(maxsize=None)
+def get_client(tracking_uri=None):
+    """Shared MlflowClient (and therefore shared HTTP connection pool) for this process"""
+    from mlflow.tracking import MlflowClient
+    return MlflowClient(tracking_uri=tracking_uri)
+
+
+def run_concurrently(*calls):
+    """Run independent zero-argument callables in parallel and return their results in order"""
+    if len(calls) == 1:
+        return [calls[0]()]
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(calls))) as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
+
+
+def log_run_data(run_id, params=None, metrics=None, tags=None):
+    """Log params, metrics and tags for a run in one log_batch round trip"""
+    from mlflow.entities import Metric, Param, RunTag
+
+    timestamp = int(time.time() * 1000)
+    get_client().log_batch(
+        run_id,
+        metrics=[Metric(key, float(value), timestamp, 0) for key, value in (metrics or {}).items()],
+        params=[Param(key, str(value)) for key, value in (params or {}).items()],
+        tags=[RunTag(key, str(value)) for key, value in (tags or {}).items()]
+    )
+
+
+def log_artifacts_concurrently(run_id, artifacts):
+    """Upload (local_path, artifact_path) pairs in parallel; directories are uploaded file by file"""
+    uploads = []
+    for local_path, artifact_path in artifacts:
+        if os.path.isdir(local_path):
+            for root, _, files in os.walk(local_path):
+                rel_dir = os.path.relpath(root, local_path)
+                target = artifact_path if rel_dir == "." else os.path.join(artifact_path or "", rel_dir)
+                uploads.extend((os.path.join(root, name), target) for name in files)
+        else:
+            uploads.append((local_path, artifact_path))
+
+    client = get_client()
+    if uploads:
+        run_concurrently(*[
+            (lambda path=path, target=target: client.log_artifact(run_id, path, target))
+            for path, target in uploads
+        ])
+    return len(uploads)
+
+
+def ensure_registered_model(name):
+    """Create the registered model if it does not exist yet"""
+    from mlflow.exceptions import MlflowException
+
+    client = get_client()
+    try:
+        return client.get_registered_model(name)
+    except MlflowException:
+        try:
+            return client.create_registered_model(name)
+        except MlflowException:
+            # Another run registered it in the meantime
+            return client.get_registered_model(name)
+
+
+def ensure_model_version(name, model_uri, run_id):
+    """Return the model version registered for run_id, creating it only if missing"""
+    client = get_client()
+    existing = client.search_model_versions(f"name='{name}' and run_id='{run_id}'")
+    if existing:
+        version = min(existing, key=lambda mv: int(mv.version))
+        print(f"♻️ Reusing {name} v{version.version} already registered for run {run_id}")
+        return version
+
+    ensure_registered_model(name)
+    return client.create_model_version(name=name, source=model_uri, run_id=run_id)
+
+
+def promote(name, version, stage="Production"):
+    """Move a model version to a stage unless it is already there"""
+    client = get_client()
+    if getattr(version, "current_stage", None) == stage:
+        return version
+    return client.transition_model_version_stage(name=name, version=version.version, stage=stage)
+
+
+def find_production_version(name, tracking_uri=None):
+    """Latest model version in the Production stage, or None"""
+    # get_latest_versions() is deprecated; the stage cannot be part of the search filter,
+    # so filter the model's versions here
+    versions = [
+        mv for mv in get_client(tracking_uri).search_model_versions(f"name='{name}'")
+        if mv.current_stage == "Production"
+    ]
+    return max(versions, key=lambda mv: int(mv.version)) if versions else None
+
+
+def tag_model_version(name, version, tags):
+    """Set several tags on a model version concurrently"""
+    client = get_client()
+    run_concurrently(*[
+        (lambda key=key, value=value: client.set_model_version_tag(name, version, key, str(value)))
+        for key, value in tags.items()
+    ])
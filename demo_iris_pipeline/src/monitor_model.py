@@ -6,21 +6,22 @@ Exports metrics to Prometheus for Grafana visualization
 
 import os
 import json
-import time
 import logging
-import requests  # Use requests instead of curl
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+JOB_NAME = 'iris-mlops-pipeline'
+
 def get_environment_vars():
     """Get environment variables for monitoring"""
     return {
         'model_version': os.getenv('MODEL_VERSION', 'unknown'),
         'environment': os.getenv('NAMESPACE', 'unknown'),
         'stage': os.getenv('PIPELINE_STAGE', 'unknown'),
-        'pushgateway_url': os.getenv('PUSHGATEWAY_URL', 'http://prometheus-pushgateway.monitoring.svc.cluster.local:9091')
+        'pushgateway_url': os.getenv('PUSHGATEWAY_URL', 'http://prometheus-pushgateway.monitoring.svc.cluster.local:9091'),
+        'retain_versions': int(os.getenv('MONITOR_RETAIN_VERSIONS', 5))
     }
 
 def load_validation_results():
@@ -38,8 +39,80 @@ def load_validation_results():
         logger.error(f"Error loading validation results: {e}")
         return {}
 
+def build_registry(validation_results):
+    """Pipeline metrics for one push group
+
+    version/environment/stage come from the Pushgateway grouping key, which the
+    gateway attaches to every series in the group, so the samples carry no labels.
+    """
+    from prometheus_client import CollectorRegistry, Gauge
+
+    registry = CollectorRegistry()
+    for name, key, documentation in (
+        ('iris_model_accuracy', 'accuracy', 'Validation accuracy of the model version'),
+        ('iris_model_precision', 'precision', 'Validation precision of the model version'),
+        ('iris_model_recall', 'recall', 'Validation recall of the model version'),
+        ('iris_model_f1_score', 'f1_score', 'Validation F1 score of the model version'),
+    ):
+        Gauge(name, documentation, registry=registry).set(validation_results.get(key, 0) or 0)
+    Gauge('iris_pipeline_stage_success', 'Pipeline stage completed', registry=registry).set(1)
+    Gauge('iris_model_deployment_timestamp', 'Unix time of the last push for this version',
+          registry=registry).set_to_current_time()
+    return registry
+
+def grouping_key(env_vars):
+    return {
+        'version': env_vars['model_version'],
+        'environment': env_vars['environment'],
+        'stage': env_vars['stage']
+    }
+
+def list_pipeline_groups(pushgateway_url, environment, timeout=10):
+    """Grouping keys (labels minus job) of this pipeline's groups for one environment"""
+    import requests
+    response = requests.get(f"{pushgateway_url}/api/v1/metrics", timeout=timeout)
+    response.raise_for_status()
+    groups = []
+    for group in response.json().get('data', []):
+        labels = dict(group.get('labels', {}))
+        if labels.pop('job', None) == JOB_NAME and labels.get('environment') == environment:
+            groups.append(labels)
+    return groups
+
+def select_stale_groups(groups, current_version, retain=5):
+    """Groups whose version is outside the newest `retain` versions (the current one is always kept)
+
+    Versions are ordered by semver, so 0.10.0 is newer than 0.9.0; unparseable
+    versions sort oldest and are the first to go.
+    """
+    from version_index import parse_version
+
+    def sort_key(version):
+        try:
+            return (1, parse_version(version))
+        except (TypeError, ValueError):
+            return (0, str(version))
+
+    versions = sorted({group.get('version', '') for group in groups}, key=sort_key, reverse=True)
+    keep = set(versions[:max(retain, 0)]) | {current_version}
+    return [group for group in groups if group.get('version', '') not in keep]
+
+def apply_retention(env_vars):
+    """Delete Pushgateway groups for versions beyond the retention window; returns the number deleted"""
+    from prometheus_client import delete_from_gateway
+
+    groups = list_pipeline_groups(env_vars['pushgateway_url'], env_vars['environment'])
+    stale = select_stale_groups(groups, env_vars['model_version'], env_vars['retain_versions'])
+    for group in stale:
+        delete_from_gateway(env_vars['pushgateway_url'], job=JOB_NAME, grouping_key=group, timeout=10)
+    if stale:
+        logger.info(f"🗑️ Deleted {len(stale)} stale Pushgateway groups "
+                    f"(keeping the newest {env_vars['retain_versions']} versions of {len({g.get('version') for g in groups})})")
+    return len(stale)
+
 def export_metrics_to_pushgateway():
-    """Export metrics to Prometheus Pushgateway using requests"""
+    """Export metrics to the Prometheus Pushgateway and prune groups of old versions"""
+    from prometheus_client import push_to_gateway  # imported lazily to keep startup fast
     env_vars = get_environment_vars()
     validation_results = load_validation_results()
     
@@ -53,50 +126,23 @@ def export_metrics_to_pushgateway():
             'validation_status': 'UNKNOWN'
         }
     
-    # Create metrics in Prometheus format
-    metrics_data = f"""# MLOps Pipeline Metrics
-# TYPE iris_model_accuracy gauge
-iris_model_accuracy{{version="{env_vars['model_version']}",environment="{env_vars['environment']}"}} {validation_results.get('accuracy', 0)}
-
-# TYPE iris_model_precision gauge  
-iris_model_precision{{version="{env_vars['model_version']}",environment="{env_vars['environment']}"}} {validation_results.get('precision', 0)}
-
-# TYPE iris_model_recall gauge
-iris_model_recall{{version="{env_vars['model_version']}",environment="{env_vars['environment']}"}} {validation_results.get('recall', 0)}
-
-# TYPE iris_model_f1_score gauge
-iris_model_f1_score{{version="{env_vars['model_version']}",environment="{env_vars['environment']}"}} {validation_results.get('f1_score', 0)}
-
-# TYPE iris_pipeline_stage_success counter
-iris_pipeline_stage_success{{version="{env_vars['model_version']}",environment="{env_vars['environment']}",stage="{env_vars['stage']}"}} 1
-
-# TYPE iris_model_deployment_timestamp gauge
-iris_model_deployment_timestamp{{version="{env_vars['model_version']}",environment="{env_vars['environment']}"}} {time.time()}
-"""
-    
-    # Push metrics using requests with timeout
-    pushgateway_url = f"{env_vars['pushgateway_url']}/metrics/job/iris-mlops-pipeline/version/{env_vars['model_version']}/environment/{env_vars['environment']}/stage/{env_vars['stage']}"
+    registry = build_registry(validation_results)
     
     try:
-        logger.info(f"Pushing metrics to {pushgateway_url}")
-        response = requests.post(
-            pushgateway_url,
-            data=metrics_data,
-            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'},
-            timeout=10  # 10 second timeout
-        )
-        
-        if response.status_code == 200:
-            logger.info("✅ Successfully pushed metrics to Pushgateway")
-        else:
-            logger.warning(f"⚠️ Failed to push metrics: {response.status_code} - {response.text}")
-            
-    except requests.exceptions.Timeout:
-        logger.error("❌ Timeout pushing metrics to Pushgateway")
-    except requests.exceptions.ConnectionError:
-        logger.error("❌ Connection error to Pushgateway")
+        logger.info(f"Pushing metrics to {env_vars['pushgateway_url']} for {grouping_key(env_vars)}")
+        # PUT replaces the whole group, so re-runs of a stage never accumulate stale series
+        push_to_gateway(env_vars['pushgateway_url'], job=JOB_NAME, registry=registry,
+                        grouping_key=grouping_key(env_vars), timeout=10)
+        logger.info("✅ Successfully pushed metrics to Pushgateway")
     except Exception as e:
         logger.error(f"❌ Error pushing metrics: {e}")
+        return
+    
+    # Bound the number of groups: every release adds one per stage and the gateway never expires them
+    try:
+        apply_retention(env_vars)
+    except Exception as e:
+        logger.warning(f"⚠️ Pushgateway retention skipped: {e}")
 
 def main():
     """Main monitoring function"""
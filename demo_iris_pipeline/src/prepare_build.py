@@ -1,24 +1,66 @@
 # Handle model preparation for kaniko build
+from profiling import StepProfiler
 import os
 import json
 import pickle
-import mlflow.sklearn
 
 def prepare_model_for_build():
     """Download model from MLflow and prepare for container build"""
-    # Load model info from training step
-    with open('/output/model_info.json', 'r') as f:
-        model_info = json.load(f)
+    profiler = StepProfiler("prepare_build").start()
+
+    model_info = {}
+    try:
+        # Load model info from training step
+        model_info_path = os.path.join(os.getenv('OUTPUT_DIR', '/output'), 'model_info.json')
+        with open(model_info_path, 'r') as f:
+            model_info = json.load(f)
+    
+        # Download model from MLflow (reuses the validation step's download via the artifact cache)
+        with profiler.phase("load_model"):
+            from artifact_cache import load_sklearn_model
+            model = load_sklearn_model(model_info['model_uri'])
+
+        # Shrink the forest for serving. The compacted forest is the model that gets served,
+        # so it must pass the validate step's accuracy and per-class checks itself, plus a
+        # fidelity gate on probe rows disjoint from the rows the trees were selected on
+        if os.getenv('COMPACT_MODEL', 'true').lower() in ('1', 'true', 'yes'):
+            with profiler.phase("compact_model"):
+                from sklearn.datasets import load_iris
+                from compact_forest import compact_forest, fidelity_sets
+                from test_model import (load_test_data, validate_compaction,
+                                        validate_model_accuracy, validate_model_performance)
+                X_select, X_probe = fidelity_sets(load_iris(return_X_y=True)[0])
+                model, report = compact_forest(model, X_select, X_probe)
+                validate_compaction(report)
+                X_test, y_test = load_test_data()
+                accuracy, _ = validate_model_accuracy(model, X_test, y_test)
+                validate_model_performance(model, X_test, y_test)
+
+            report['accuracy'] = float(accuracy)
+            model_info['compaction'] = report
+            with open(model_info_path, 'w') as f:
+                json.dump(model_info, f, indent=2)
     
-    # Download model from MLflow
-    model = mlflow.sklearn.load_model(model_info['model_uri'])
+        # Distilled student for latency-critical callers (served when a request asks for it)
+        student = None
+        if model_info.get('student'):
+            with profiler.phase("load_student"):
+                student = load_sklearn_model(model_info['student']['model_uri'])
     
-    # Save for container
-    os.makedirs('model', exist_ok=True)
-    with open('model/model.pkl', 'wb') as f:
-        pickle.dump(model, f)
+        # Save for container
+        with profiler.phase("save_model"):
+            os.makedirs('model', exist_ok=True)
+            with open('model/model.pkl', 'wb') as f:
+                pickle.dump(model, f)
+            if student is not None:
+                with open('model/student.pkl', 'wb') as f:
+                    pickle.dump(student, f)
     
-    print("✅ Model prepared for container build")
+        print("✅ Model prepared for container build")
+    finally:
+        # A failed build (e.g. a compaction gate) keeps its profile too
+        profiler.stop()
+        profiler.log_to_mlflow(model_info.get('run_id'))
 
 if __name__ == "__main__":
     prepare_model_for_build()
\ No newline at end of file
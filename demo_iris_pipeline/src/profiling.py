@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Opt-in step instrumentation for the MLOps pipeline scripts
+Records phase timings, peak memory, import time and optional cProfile dumps
+
+Import this module FIRST in a step script: the time between importing it and
+creating the StepProfiler is reported as the "import" phase.
+"""
+
+import os
+import json
+import time
+import socket
+import resource
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from workspace import workspace_path, workspace_dir
+
+_IMPORTED_AT = time.perf_counter()
+
+
+def profiling_enabled():
+    """Check whether instrumentation is switched on for this step"""
+    return os.getenv("PIPELINE_PROFILE", "false").lower() in ("1", "true", "yes")
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MiB (ru_maxrss is KiB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _current_rss_mb():
+    """Current resident set size of this process in MiB"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StepProfiler:
+    """Collect per-phase timings and memory for one pipeline step
+
+    Disabled profilers are no-ops, so steps can always wrap their phases.
+    """
+
+    def __init__(self, step, enabled=None, output_dir=None):
+        self.step = step
+        self.enabled = profiling_enabled() if enabled is None else enabled
+        self.output_dir = output_dir or os.getenv("PIPELINE_PROFILE_DIR", workspace_path("profiles"))
+        self.use_cprofile = os.getenv("PIPELINE_PROFILE_CPROFILE", "false").lower() in ("1", "true", "yes")
+        self.phases = []
+        self._profiler = None
+        self._started = None
+        self._finished = None
+
+    def start(self):
+        """Start collecting; the time since importing this module becomes the import phase"""
+        if not self.enabled or self._started is not None:
+            return self
+        self._started = time.perf_counter()
+        self.phases.append({
+            "name": "import",
+            "seconds": round(self._started - _IMPORTED_AT, 6),
+            "rss_mb": _current_rss_mb(),
+            "peak_rss_mb": _peak_rss_mb(),
+            "tracemalloc_peak_mb": None
+        })
+        tracemalloc.start()
+        if self.use_cprofile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def stop(self):
+        """Stop collecting and write the report"""
+        if not self.enabled or self._started is None or self._finished is not None:
+            return None
+        if self._profiler is not None:
+            self._profiler.disable()
+        self._finished = time.perf_counter()
+        tracemalloc.stop()
+        return self.save()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.enabled:
+            self.phases.append({"name": "error", "error": f"{exc_type.__name__}: {exc}"})
+        self.stop()
+        return False
+
+    @contextmanager
+    def phase(self, name):
+        """Time a named phase and record its memory high-water marks"""
+        if not self.enabled or self._started is None:
+            yield
+            return
+        tracemalloc.reset_peak()
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            _, traced_peak = tracemalloc.get_traced_memory()
+            self.phases.append({
+                "name": name,
+                "seconds": round(time.perf_counter() - begin, 6),
+                "rss_mb": _current_rss_mb(),
+                "peak_rss_mb": _peak_rss_mb(),
+                "tracemalloc_peak_mb": round(traced_peak / (1024.0 * 1024.0), 3)
+            })
+
+    def report(self):
+        """Build the structured profile report"""
+        end = self._finished or time.perf_counter()
+        return {
+            "step": self.step,
+            "timestamp": datetime.utcnow().isoformat() + 'Z',
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "total_seconds": round(end - _IMPORTED_AT, 6),
+            "peak_rss_mb": _peak_rss_mb(),
+            "cpu_user_seconds": resource.getrusage(resource.RUSAGE_SELF).ru_utime,
+            "cpu_system_seconds": resource.getrusage(resource.RUSAGE_SELF).ru_stime,
+            "phases": self.phases
+        }
+
+    def save(self):
+        """Write the JSON report (and cProfile stats if enabled) to the output directory"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        report = self.report()
+
+        if self._profiler is not None:
+            stats_path = os.path.join(self.output_dir, f"{self.step}.prof")
+            self._profiler.dump_stats(stats_path)
+            report["cprofile_path"] = stats_path
+
+        report_path = os.path.join(self.output_dir, f"{self.step}.json")
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+        print(f"📈 Profile for step '{self.step}' saved to {report_path}")
+        for entry in report["phases"]:
+            if "seconds" in entry:
+                print(f"   {entry['name']:<16} {entry['seconds']:>9.3f}s  peak RSS {entry['peak_rss_mb']:.1f} MiB")
+        return report_path
+
+    def log_to_mlflow(self, run_id=None):
+        """Attach the saved report to an MLflow run; skipped if mlflow is not installed"""
+        if not self.enabled or self._finished is None:
+            return
+        try:
+            import mlflow
+        except ImportError:
+            print("⚠️ mlflow not installed - profile kept on the workspace only")
+            return
+
+        run_id = run_id or _training_run_id()
+        if run_id is None:
+            print("⚠️ No MLflow run id available - profile not logged")
+            return
+
+        try:
+            client = mlflow.tracking.MlflowClient()
+            client.log_artifact(run_id, os.path.join(self.output_dir, f"{self.step}.json"), "profiles")
+            prof_path = os.path.join(self.output_dir, f"{self.step}.prof")
+            if self._profiler is not None and os.path.exists(prof_path):
+                client.log_artifact(run_id, prof_path, "profiles")
+            print(f"✅ Profile for step '{self.step}' logged to MLflow run {run_id}")
+        except Exception as e:
+            print(f"⚠️ Warning: Could not log profile to MLflow: {e}")
+
+
+def _training_run_id():
+    """Look up the training run id recorded in model_info.json"""
+    for directory in (workspace_dir(), os.getenv("OUTPUT_DIR", "/output")):
+        path = os.path.join(directory, "model_info.json")
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f).get("run_id")
+    return None
@@ -1,27 +1,80 @@
 import pickle, os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 import numpy as np
-import uvicorn
+from prometheus_client import CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+from serving_load import LoadTracker, LoadCollector, LoadSheddingMiddleware, get_load_config
 
 model_path = os.getenv("MODEL_PATH", "/model/model.pkl")
 with open(model_path, "rb") as f:
     model = pickle.load(f)
 
+# Optional distilled student, picked per request with {"variant": "student"}
+student = None
+student_path = os.getenv("STUDENT_MODEL_PATH", os.path.join(os.path.dirname(model_path), "student.pkl"))
+if os.path.exists(student_path):
+    with open(student_path, "rb") as f:
+        student = pickle.load(f)
+
+# Optional traffic capture for retraining (CAPTURE_ENABLED=true)
+capture = None
+if os.getenv("CAPTURE_ENABLED", "false").lower() in ("1", "true", "yes"):
+    from capture import CaptureBuffer
+    capture = CaptureBuffer.from_env(model.n_features_in_).start()
+
+# In-flight/queue-wait/service-time EWMAs drive autoscaling and priority load shedding
+load_tracker = LoadTracker.from_env()
+metrics_registry = CollectorRegistry()
+metrics_registry.register(LoadCollector(load_tracker))
+
 app = FastAPI()
+app.add_middleware(LoadSheddingMiddleware, tracker=load_tracker,
+                   retry_after=get_load_config()['retry_after'])
 
 @app.post("/predict")
-def predict(payload: dict):
+def predict(payload: dict, request: Request):
+    load_tracker.started(request.scope)
     data = np.array(payload["instances"])
-    preds = model.predict(data).tolist()
-    return {"predictions": preds}
+    # Fall back to the full model when no student was shipped
+    variant = "student" if payload.get("variant") == "student" and student is not None else "teacher"
+    preds = (student if variant == "student" else model).predict(data)
+    if capture is not None:
+        try:
+            capture.record(data, preds)
+        except ValueError:
+            pass  # capture is best effort and counts the rows as failed_rows; never fail the prediction
+    return {"predictions": preds.tolist(), "variant": variant}
 
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+def metrics():
+    return Response(generate_latest(metrics_registry), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/load")
+async def load():
+    return load_tracker.snapshot()
+
+@app.get("/capture/stats")
+async def capture_stats():
+    if capture is None:
+        return {"enabled": False}
+    return {"enabled": True, **capture.stats()}
+
+@app.on_event("shutdown")
+def flush_capture():
+    if capture is not None:
+        capture.close()
+
 @app.get("/")
 async def root():
     return {"message": "Iris classifier is running"}
 
+def main():
+    """Run the prediction server"""
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 8080)))
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    main()
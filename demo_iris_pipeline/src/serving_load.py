@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Concurrency tracking and priority load shedding for serve.py
+
+LoadTracker keeps exponentially weighted moving averages of requests in flight,
+queue wait (ASGI arrival -> endpoint start, i.e. time spent waiting for a
+threadpool worker) and service time. The in-flight EWMA is the autoscaling
+signal: unlike CPU it rises as soon as one-row requests start queueing.
+
+LoadSheddingMiddleware rejects /predict requests with 503 once the replica is
+saturated, lowest priority first, based on the X-Priority request header:
+
+    critical   never shed
+    normal     shed at SERVE_MAX_CONCURRENCY requests in flight (default)
+    bulk       shed at SERVE_BULK_SHED_FRACTION of that, or under load when
+               the queue wait EWMA exceeds SERVE_BULK_MAX_QUEUE_WAIT_MS
+"""
+
+import os
+import math
+import time
+import json
+import threading
+
+PRIORITIES = ("critical", "normal", "bulk")
+DEFAULT_PRIORITY = "normal"
+ARRIVAL_KEY = "iris.arrival"
+STARTED_KEY = "iris.started"
+
+
+def get_load_config():
+    """Get load tracking and shedding settings from environment variables"""
+    return {
+        'max_concurrency': int(os.getenv('SERVE_MAX_CONCURRENCY', 16)),
+        'bulk_shed_fraction': float(os.getenv('SERVE_BULK_SHED_FRACTION', 0.5)),
+        'bulk_max_queue_wait': float(os.getenv('SERVE_BULK_MAX_QUEUE_WAIT_MS', 50)) / 1000.0,
+        'ewma_seconds': float(os.getenv('SERVE_EWMA_SECONDS', 10)),
+        'ewma_alpha': float(os.getenv('SERVE_EWMA_ALPHA', 0.2)),
+        'retry_after': int(os.getenv('SERVE_RETRY_AFTER_SECONDS', 1))
+    }
+
+
+def normalize_priority(value):
+    """Map a raw X-Priority header value onto a known priority class"""
+    value = (value or DEFAULT_PRIORITY).strip().lower()
+    return value if value in PRIORITIES else DEFAULT_PRIORITY
+
+
+class LoadTracker:
+    """Thread-safe in-flight, queue wait and service time EWMAs plus per-priority counters"""
+
+    def __init__(self, max_concurrency=16, bulk_shed_fraction=0.5, bulk_max_queue_wait=0.05,
+                 ewma_seconds=10.0, ewma_alpha=0.2, clock=time.monotonic):
+        self.max_concurrency = max_concurrency
+        self.bulk_shed_fraction = bulk_shed_fraction
+        self.bulk_max_queue_wait = bulk_max_queue_wait
+        self.ewma_seconds = ewma_seconds
+        self.ewma_alpha = ewma_alpha
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._inflight_ewma = 0.0
+        self._inflight_updated = clock()
+        self.queue_wait_ewma = 0.0
+        self.service_time_ewma = 0.0
+        self.requests = {priority: 0 for priority in PRIORITIES}
+        self.shed = {priority: 0 for priority in PRIORITIES}
+
+    @classmethod
+    def from_env(cls):
+        config = get_load_config()
+        config.pop('retry_after')
+        return cls(**config)
+
+    def _decayed_inflight(self, now):
+        # Time-weighted EWMA: the in-flight count held constant since the last update
+        weight = math.exp(-(now - self._inflight_updated) / self.ewma_seconds) if self.ewma_seconds > 0 else 0.0
+        return self._inflight_ewma * weight + self.in_flight * (1.0 - weight)
+
+    def _set_in_flight(self, delta, now):
+        self._inflight_ewma = self._decayed_inflight(now)
+        self._inflight_updated = now
+        self.in_flight += delta
+
+    def _ewma(self, current, sample):
+        return sample if current == 0.0 else current + self.ewma_alpha * (sample - current)
+
+    def _should_shed(self, priority):
+        if priority == "critical":
+            return False
+        if priority == "bulk":
+            # Queue wait only counts while something is in flight: shed requests add no new
+            # samples, so an idle replica must not keep rejecting on a stale average
+            return (self.in_flight >= self.max_concurrency * self.bulk_shed_fraction
+                    or (self.in_flight > 0 and self.queue_wait_ewma > self.bulk_max_queue_wait))
+        return self.in_flight >= self.max_concurrency
+
+    def should_shed(self, priority):
+        """Whether a new request of this priority would be rejected right now"""
+        with self._lock:
+            return self._should_shed(priority)
+
+    def admit(self, priority):
+        """Count an arriving request in flight, or record it as shed; returns True if admitted"""
+        with self._lock:
+            if self._should_shed(priority):
+                self.shed[priority] += 1
+                return False
+            self.requests[priority] += 1
+            self._set_in_flight(1, self.clock())
+        return True
+
+    def started(self, scope):
+        """Called by the endpoint when it starts running; records queue wait"""
+        now = self.clock()
+        scope[STARTED_KEY] = now
+        arrival = scope.get(ARRIVAL_KEY)
+        if arrival is not None:
+            with self._lock:
+                self.queue_wait_ewma = self._ewma(self.queue_wait_ewma, now - arrival)
+
+    def finished(self, scope):
+        """Called when the response is complete; records service time and leaves flight"""
+        now = self.clock()
+        with self._lock:
+            started = scope.get(STARTED_KEY)
+            if started is not None:
+                self.service_time_ewma = self._ewma(self.service_time_ewma, now - started)
+            self._set_in_flight(-1, now)
+
+    def snapshot(self):
+        """Current load signal; the in-flight EWMA is decayed up to now without mutating it"""
+        with self._lock:
+            inflight_ewma = self._decayed_inflight(self.clock())
+            return {
+                'in_flight': self.in_flight,
+                'in_flight_ewma': inflight_ewma,
+                'queue_wait_ewma_seconds': self.queue_wait_ewma,
+                'service_time_ewma_seconds': self.service_time_ewma,
+                'saturation': inflight_ewma / self.max_concurrency if self.max_concurrency else 0.0,
+                'max_concurrency': self.max_concurrency,
+                'requests': dict(self.requests),
+                'shed': dict(self.shed)
+            }
+
+
+class LoadCollector:
+    """prometheus_client collector that reads the tracker at scrape time"""
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+
+        snapshot = self.tracker.snapshot()
+        for name, key, documentation in (
+            ("iris_serving_inflight_requests", "in_flight", "Requests currently in flight"),
+            ("iris_serving_inflight_ewma", "in_flight_ewma", "Time-weighted EWMA of requests in flight"),
+            ("iris_serving_queue_wait_seconds_ewma", "queue_wait_ewma_seconds", "EWMA of time waiting for a worker"),
+            ("iris_serving_service_time_seconds_ewma", "service_time_ewma_seconds", "EWMA of request service time"),
+            ("iris_serving_saturation", "saturation", "In-flight EWMA divided by the shedding concurrency limit"),
+        ):
+            yield GaugeMetricFamily(name, documentation, value=snapshot[key])
+
+        requests = CounterMetricFamily("iris_serving_requests", "Admitted prediction requests", labels=["priority"])
+        shed = CounterMetricFamily("iris_serving_shed", "Prediction requests rejected by load shedding", labels=["priority"])
+        for priority in PRIORITIES:
+            requests.add_metric([priority], snapshot['requests'][priority])
+            shed.add_metric([priority], snapshot['shed'][priority])
+        yield requests
+        yield shed
+
+
+class LoadSheddingMiddleware:
+    """Pure ASGI middleware: admission control and in-flight accounting for the given paths"""
+
+    def __init__(self, app, tracker, paths=("/predict",), retry_after=1):
+        self.app = app
+        self.tracker = tracker
+        self.paths = set(paths)
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        header = dict(scope.get("headers") or []).get(b"x-priority", b"").decode("latin-1")
+        priority = normalize_priority(header)
+        if not self.tracker.admit(priority):
+            await self._reject(send, priority)
+            return
+
+        scope[ARRIVAL_KEY] = self.tracker.clock()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.finished(scope)
+
+    async def _reject(self, send, priority):
+        body = json.dumps({"error": "overloaded", "priority": priority}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(self.retry_after).encode("ascii"))
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,18 +1,20 @@
+from profiling import StepProfiler
 import json
-import mlflow
-import mlflow.sklearn
-import numpy as np
-from sklearn.datasets import load_iris
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from sklearn.model_selection import train_test_split
 import os
+from datetime import datetime
+from workspace import workspace_path
+
+# mlflow, numpy and sklearn are imported inside the functions that need them
+# so the validate subcommand only pays for what it actually uses
 
 def load_model(model_path=None):
-    """Load model from MLflow using model_info.json"""
-    if os.path.exists('/workspace/model_info.json'):
-        with open('/workspace/model_info.json', 'r') as f:
+    """Load model from MLflow (via the shared artifact cache) using model_info.json"""
+    model_info_path = workspace_path('model_info.json')
+    if os.path.exists(model_info_path):
+        with open(model_info_path, 'r') as f:
             model_info = json.load(f)
-        return mlflow.sklearn.load_model(model_info['model_uri'])
+        from artifact_cache import load_sklearn_model
+        return load_sklearn_model(model_info['model_uri'])
     elif model_path and os.path.exists(model_path):
         # Fallback to pickle file
         import pickle
@@ -21,8 +23,22 @@ def load_model(model_path=None):
     else:
         raise FileNotFoundError("No model found")
 
+def load_student_model():
+    """Load the distilled student registered alongside the teacher, or None if there is none"""
+    model_info_path = workspace_path('model_info.json')
+    if not os.path.exists(model_info_path):
+        return None
+    with open(model_info_path, 'r') as f:
+        student_info = json.load(f).get('student')
+    if not student_info:
+        return None
+    from artifact_cache import load_sklearn_model
+    return load_sklearn_model(student_info['model_uri'])
+
 def load_test_data():
     """Load and split iris dataset for testing"""
+    from sklearn.datasets import load_iris
+    from sklearn.model_selection import train_test_split
     X, y = load_iris(return_X_y=True)
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.3, random_state=42, stratify=y
@@ -31,6 +47,7 @@ def load_test_data():
 
 def validate_model_accuracy(model, X_test, y_test, min_accuracy=0.85):
     """Test model accuracy meets minimum threshold"""
+    from sklearn.metrics import accuracy_score
     predictions = model.predict(X_test)
     accuracy = accuracy_score(y_test, predictions)
     
@@ -44,6 +61,7 @@ def validate_model_accuracy(model, X_test, y_test, min_accuracy=0.85):
 
 def validate_model_predictions(model, X_test):
     """Test model prediction format and types"""
+    import numpy as np
     predictions = model.predict(X_test)
     
     # Check prediction shape
@@ -62,6 +80,7 @@ def validate_model_predictions(model, X_test):
 
 def validate_model_performance(model, X_test, y_test):
     """Comprehensive model performance validation"""
+    from sklearn.metrics import classification_report, confusion_matrix
     predictions = model.predict(X_test)
     
     # Generate classification report
@@ -82,6 +101,7 @@ def validate_model_performance(model, X_test, y_test):
 
 def validate_model_api_format(model, sample_input):
     """Test model works with API input format"""
+    import numpy as np
     # Test single prediction
     single_pred = model.predict([sample_input])
     assert len(single_pred) == 1, "Single prediction failed"
@@ -94,6 +114,69 @@ def validate_model_api_format(model, sample_input):
     print("✅ Model API format validation passed")
     return True
 
+def measure_row_latency_us(model, X_test, repeats=200):
+    """Median single-row predict latency in microseconds"""
+    import time
+    import numpy as np
+    timings = []
+    for i in range(repeats):
+        row = X_test[i % len(X_test)].reshape(1, -1)
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e6)
+
+def validate_student(teacher, student, X_test, y_test, min_agreement=None):
+    """Test the distilled student agrees with the teacher and report the latency gain"""
+    import numpy as np
+    if min_agreement is None:
+        min_agreement = float(os.getenv('STUDENT_MIN_AGREEMENT', 0.9))
+
+    kind = getattr(student, 'kind', type(student).__name__)
+    student_predictions = student.predict(X_test)
+    agreement = float(np.mean(teacher.predict(X_test) == student_predictions))
+    accuracy = float(np.mean(student_predictions == y_test))
+    teacher_us = measure_row_latency_us(teacher, X_test, repeats=50)
+    student_us = measure_row_latency_us(student, X_test)
+
+    print(f"Student ({kind}): agreement with teacher {agreement:.4f} "
+          f"(required {min_agreement}), accuracy {accuracy:.4f}")
+    print(f"Per-row latency: teacher {teacher_us:.1f} µs, student {student_us:.1f} µs "
+          f"({teacher_us / student_us:.1f}x faster)")
+
+    if agreement < min_agreement:
+        raise ValueError(f"Student agreement {agreement:.4f} below threshold {min_agreement}")
+
+    print("✅ Student model validation passed")
+    return {
+        "kind": kind,
+        "agreement": agreement,
+        "accuracy": accuracy,
+        "teacher_latency_us": round(teacher_us, 1),
+        "student_latency_us": round(student_us, 1),
+        "speedup": round(teacher_us / student_us, 1)
+    }
+
+def validate_compaction(report, min_fidelity=None):
+    """Test the compacted forest agrees with the full model on the probe rows and is actually smaller"""
+    if min_fidelity is None:
+        min_fidelity = 1.0 - report['tolerance']
+
+    print(f"Compacted forest: {report['n_trees_before']} -> {report['n_trees_after']} trees, "
+          f"{report['bytes_before']} -> {report['bytes_after']} bytes, "
+          f"{report['latency_us_per_row_before']} -> {report['latency_us_per_row_after']} µs/row")
+    print(f"Fidelity to full forest: {report['fidelity']:.4f} on {report['probe_rows']} probe rows "
+          f"(required {min_fidelity:.4f}), {report['selection_fidelity']:.4f} on the "
+          f"{report['selection_rows']} selection rows")
+
+    if report['fidelity'] < min_fidelity:
+        raise ValueError(f"Compacted model fidelity {report['fidelity']:.4f} below threshold {min_fidelity:.4f}")
+    if report['bytes_after'] > report['bytes_before']:
+        raise ValueError(f"Compacted model is larger than the original ({report['bytes_after']} > {report['bytes_before']} bytes)")
+
+    print("✅ Model compaction validation passed")
+    return True
+
 def save_validation_results(results, output_path_arg=None): # Use a different name for the argument
     """Save validation results for downstream use"""
     # Prioritize environment variable, then argument, then a sensible default
@@ -118,17 +201,28 @@ def save_validation_results(results, output_path_arg=None): # Use a different na
 def main():
     """Main validation pipeline"""
     print("🧪 Starting Model Validation Tests...")
+    profiler = StepProfiler("validate").start()
     
     try:
         # Load model and test data
-        model = load_model()
-        X_test, y_test = load_test_data()
+        with profiler.phase("load_model"):
+            model = load_model()
+        with profiler.phase("load_data"):
+            X_test, y_test = load_test_data()
         
         # Run validation tests
-        accuracy, predictions = validate_model_accuracy(model, X_test, y_test)
-        validate_model_predictions(model, X_test)
-        report, conf_matrix = validate_model_performance(model, X_test, y_test)
-        validate_model_api_format(model, X_test[0])
+        with profiler.phase("validate"):
+            accuracy, predictions = validate_model_accuracy(model, X_test, y_test)
+            validate_model_predictions(model, X_test)
+            report, conf_matrix = validate_model_performance(model, X_test, y_test)
+            validate_model_api_format(model, X_test[0])
+
+        # Distilled student variant, if train.py produced one
+        student_results = None
+        with profiler.phase("validate_student"):
+            student = load_student_model()
+            if student is not None:
+                student_results = validate_student(model, student, X_test, y_test)
         
         # Compile results
         results = {
@@ -137,8 +231,10 @@ def main():
             "classification_report": report,
             "confusion_matrix": conf_matrix.tolist(),
             "test_count": len(X_test),
-            "timestamp": str(np.datetime64('now'))
+            "timestamp": datetime.utcnow().isoformat(timespec='seconds')
         }
+        if student_results:
+            results["student"] = student_results
         
         # Save results
         save_validation_results(results)
@@ -153,12 +249,15 @@ def main():
         failure_results = {
             "validation_status": "FAILED",
             "error": str(e),
-            "timestamp": str(np.datetime64('now'))
+            "timestamp": datetime.utcnow().isoformat(timespec='seconds')
         }
         save_validation_results(failure_results)
         
         # Exit with error code
         exit(1)
+    finally:
+        profiler.stop()
+        profiler.log_to_mlflow()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,55 +1,169 @@
-import mlflow, os, pickle, json
-from sklearn.datasets import load_iris
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
-import mlflow.sklearn
-
-mlflow.set_tracking_uri(os.environ["MLFLOW_TRACKING_URI"])
-mlflow.set_experiment("iris_demo")
-
-with mlflow.start_run():
-    X, y = load_iris(return_X_y=True)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    n_estimators = int(os.getenv("N_ESTIMATORS", 100))
-    clf = RandomForestClassifier(n_estimators=n_estimators, random_state=42)
-    clf.fit(X_tr, y_tr)
-
-    acc = accuracy_score(y_te, clf.predict(X_te))
-    mlflow.log_param("n_estimators", n_estimators)
-    mlflow.log_metric("accuracy", acc)
-
-    # Log model to MLflow with sklearn flavor
-    model_info = mlflow.sklearn.log_model(
-        clf, 
-        "model",
-        registered_model_name="iris_classifier"
-    )
-    
-    # Register the model version
-    version = os.getenv("MODEL_VERSION", "0.2.0")
-    client = mlflow.tracking.MlflowClient()
-    model_version = client.create_model_version(
-        name="iris_classifier",
-        source=model_info.model_uri,
-        run_id=mlflow.active_run().info.run_id
+from profiling import StepProfiler
+import os, json
+from concurrent.futures import ThreadPoolExecutor
+
+
+STUDENT_MODEL_NAME = "iris_classifier-student"
+
+
+def distill_student(teacher, X_train, X_test, run_id, teacher_version):
+    """Distill, log and register the student as a variant linked to the teacher's model version"""
+    import mlflow.sklearn
+    import mlflow_registry as registry
+    from distill import distill, agreement, get_distill_config
+
+    config = get_distill_config()
+    student = distill(teacher, X_train, kind=config['kind'], max_depth=config['max_depth'],
+                      augment=config['augment'], noise=config['noise'], seed=config['seed'])
+    student_agreement = agreement(teacher, student, X_test)
+
+    # The student pickles as distill.DistilledClassifier: ship distill.py with the model so
+    # any MLflow consumer can load the registered version, not just code run from src/
+    student_model_info = mlflow.sklearn.log_model(
+        student,
+        "student",
+        code_paths=[os.path.join(os.path.dirname(os.path.abspath(__file__)), "distill.py")],
+        pip_requirements=mlflow.sklearn.get_default_pip_requirements(include_cloudpickle=True)
     )
-    
-    # Transition to Production
-    client.transition_model_version_stage(
-        name="iris_classifier",
-        version=model_version.version,
-        stage="Production"
+    student_version = registry.ensure_model_version(STUDENT_MODEL_NAME, student_model_info.model_uri, run_id)
+
+    # Link both ways: the student names its teacher, the teacher version names its student
+    registry.run_concurrently(
+        lambda: registry.promote(STUDENT_MODEL_NAME, student_version, "Production"),
+        lambda: registry.tag_model_version(STUDENT_MODEL_NAME, student_version.version, {
+            "variant": "student",
+            "student_kind": config['kind'],
+            "teacher_model": "iris_classifier",
+            "teacher_version": teacher_version,
+            "teacher_agreement": round(student_agreement, 4)
+        }),
+        lambda: registry.tag_model_version("iris_classifier", teacher_version, {
+            "variant": "teacher",
+            "student_model": STUDENT_MODEL_NAME,
+            "student_version": student_version.version
+        }),
+        lambda: registry.log_run_data(run_id,
+                                      params={"distill_student": config['kind'], "distill_max_depth": config['max_depth']},
+                                      metrics={"student_agreement": student_agreement})
     )
 
-    # Write model info for deployment step
-    with open("/output/model_info.json", "w") as f:
-        json.dump({
-            "model_name": "iris_classifier",
-            "model_version": model_version.version,
-            "model_uri": model_info.model_uri,
-            "accuracy": acc
-        }, f)
-    
-    print(f"Model registered as iris_classifier v{model_version.version} with accuracy:", acc)
+    print(f"Student registered as {STUDENT_MODEL_NAME} v{student_version.version} "
+          f"({config['kind']}), agreement with teacher: {student_agreement:.4f}")
+    return {
+        "model_name": STUDENT_MODEL_NAME,
+        "model_version": student_version.version,
+        "model_uri": student_model_info.model_uri,
+        "kind": config['kind'],
+        "agreement": student_agreement
+    }
+
+
+def main():
+    """Train the iris classifier and register it in MLflow"""
+    profiler = StepProfiler("train").start()
+
+    run_id = None
+    try:
+        # Heavy imports are deferred so `iris_pipeline.py --help` and other subcommands stay fast
+        with profiler.phase("import_libs"):
+            import mlflow
+            import mlflow.sklearn
+            from sklearn.datasets import load_iris
+            from sklearn.model_selection import train_test_split
+            from sklearn.ensemble import RandomForestClassifier
+            from sklearn.metrics import accuracy_score
+            import mlflow_registry as registry
+
+        mlflow.set_tracking_uri(os.environ["MLFLOW_TRACKING_URI"])
+        mlflow.set_experiment("iris_demo")
+
+        with mlflow.start_run() as run:
+            run_id = run.info.run_id
+            with profiler.phase("load_data"):
+                X, y = load_iris(return_X_y=True)
+                X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
+
+                # Optionally add captured production traffic (labelled by the serving model's
+                # predictions) to the training split; the held-out split stays pure iris
+                captured_rows = 0
+                segments_dir = os.getenv("CAPTURE_SEGMENTS_DIR")
+                if segments_dir:
+                    import numpy as np
+                    from capture import load_segments
+                    max_rows = int(os.getenv("CAPTURE_MAX_ROWS", 50000))
+                    X_cap, y_cap = load_segments(segments_dir, max_rows=max_rows)
+                    captured_rows = len(X_cap)
+                    if captured_rows:
+                        X_tr = np.concatenate([X_tr, X_cap.astype(X_tr.dtype)])
+                        y_tr = np.concatenate([y_tr, y_cap.astype(y_tr.dtype)])
+                    print(f"📥 Ingested {captured_rows} captured rows from {segments_dir}")
+
+            n_estimators = int(os.getenv("N_ESTIMATORS", 100))
+            with profiler.phase("fit"):
+                clf = RandomForestClassifier(n_estimators=n_estimators, random_state=42)
+                clf.fit(X_tr, y_tr)
+
+            with profiler.phase("evaluate"):
+                acc = accuracy_score(y_te, clf.predict(X_te))
+
+            # Params/metrics (one log_batch call) and registered-model creation don't depend
+            # on the model upload, so they run in the background while log_model uploads
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                pending = [
+                    executor.submit(registry.log_run_data, run.info.run_id,
+                                    params={"n_estimators": n_estimators, "captured_rows": captured_rows},
+                                    metrics={"accuracy": acc}),
+                    executor.submit(registry.ensure_registered_model, "iris_classifier")
+                ]
+
+                # Log model to MLflow with sklearn flavor; explicit requirements skip MLflow's
+                # requirement inference, which reloads the model in a subprocess
+                with profiler.phase("log_model"):
+                    model_info = mlflow.sklearn.log_model(
+                        clf,
+                        "model",
+                        pip_requirements=mlflow.sklearn.get_default_pip_requirements(include_cloudpickle=True)
+                    )
+
+                for future in pending:
+                    future.result()
+
+            # Register exactly one model version for this run and move it to Production
+            with profiler.phase("register"):
+                model_version = registry.ensure_model_version(
+                    "iris_classifier", model_info.model_uri, run.info.run_id
+                )
+                registry.promote("iris_classifier", model_version, "Production")
+
+            # Optionally distill a cheap student for latency-critical callers (DISTILL_STUDENT=tree|logistic)
+            student_info = None
+            if os.getenv("DISTILL_STUDENT"):
+                with profiler.phase("distill"):
+                    student_info = distill_student(clf, X_tr, X_te, run.info.run_id, model_version.version)
+
+            # Write model info for deployment step
+            info = {
+                "model_name": "iris_classifier",
+                "model_version": model_version.version,
+                "model_uri": model_info.model_uri,
+                "run_id": run.info.run_id,
+                "accuracy": acc
+            }
+            if student_info:
+                info["student"] = student_info
+            model_info_path = os.path.join(os.getenv("OUTPUT_DIR", "/output"), "model_info.json")
+            with open(model_info_path, "w") as f:
+                json.dump(info, f)
+            registry.log_artifacts_concurrently(run.info.run_id, [(model_info_path, None)])
+
+            print(f"Model registered as iris_classifier v{model_version.version} with accuracy:", acc)
+    finally:
+        # Failed runs keep their profile too: MLflow marks the run FAILED but still takes artifacts.
+        # Without a run (e.g. MLflow unreachable) the profile stays on the workspace only
+        profiler.stop()
+        if run_id is not None:
+            profiler.log_to_mlflow(run_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Semver-ordered index of model versions for version bumping and deployment retention
+
+Versions are collected from the MLflow registry (the `semver` tag written by
+version_model.py), SeldonDeployment `version` labels and a local cache on the
+workdir PVC, then kept in sorted order so "latest", "previous N" and
+"last known good" are bisect lookups instead of string sorts.
+"""
+
+import os
+import json
+from bisect import bisect_left, insort
+
+from workspace import workspace_path
+
+INDEX_FILE_NAME = ".version_index.json"
+SEMVER_TAG = "semver"
+STATUS_TAG = "validation_status"
+# Runs that did not earn a version are tagged with the version they were compared against
+BASE_SEMVER_TAG = "base_semver"
+
+
+def parse_version(version):
+    """Parse a version string (optionally v-prefixed) into a comparable semver.Version"""
+    import semver
+    return semver.Version.parse(str(version).strip().lstrip("v"))
+
+
+def default_index_path():
+    """Local cache location on the workdir PVC"""
+    return os.getenv("VERSION_INDEX_PATH", workspace_path(INDEX_FILE_NAME))
+
+
+class VersionIndex:
+    """Sorted set of semantic versions with per-version source and health info"""
+
+    def __init__(self):
+        self._versions = []      # sorted semver.Version objects
+        self._good = []          # sorted subset known to be good
+        self._records = {}       # str(version) -> record dict
+
+    def __len__(self):
+        return len(self._versions)
+
+    def __contains__(self, version):
+        return self.get(version) is not None
+
+    def add(self, version, source, good=None, **info):
+        """Insert or update a version; good=True/False marks validation/readiness"""
+        try:
+            parsed = parse_version(version)
+        except (TypeError, ValueError):
+            print(f"⚠️ Ignoring non-semver version {version!r} from {source}")
+            return None
+
+        key = str(parsed)
+        record = self._records.get(key)
+        if record is None:
+            record = {"version": key, "sources": [], "good": None}
+            self._records[key] = record
+            insort(self._versions, parsed)
+
+        if source not in record["sources"]:
+            record["sources"].append(source)
+        record.update(info)
+
+        # A version is good if any source vouches for it; an explicit failure only
+        # counts when nothing has marked it good
+        if good is True and record["good"] is not True:
+            record["good"] = True
+            insort(self._good, parsed)
+        elif good is False and record["good"] is None:
+            record["good"] = False
+        return record
+
+    def get(self, version):
+        """Record for a version, or None (also for missing or non-semver input)"""
+        try:
+            return self._records.get(str(parse_version(version)))
+        except (TypeError, ValueError):
+            return None
+
+    def latest(self):
+        """Highest known version string, or None"""
+        return str(self._versions[-1]) if self._versions else None
+
+    def newest(self, n):
+        """The n highest versions, newest first"""
+        return [str(v) for v in reversed(self._versions[-n:])] if n > 0 else []
+
+    def previous(self, n, before=None):
+        """Up to n versions strictly older than `before` (default: latest), newest first"""
+        if not self._versions:
+            return []
+        end = bisect_left(self._versions, parse_version(before)) if before else len(self._versions) - 1
+        return [str(v) for v in reversed(self._versions[max(0, end - n):end])]
+
+    def last_known_good(self, before=None):
+        """Highest good version (strictly older than `before` if given), or None"""
+        end = bisect_left(self._good, parse_version(before)) if before else len(self._good)
+        return str(self._good[end - 1]) if end > 0 else None
+
+    def to_dict(self):
+        return {"versions": [self._records[str(v)] for v in self._versions]}
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls()
+        for record in data.get("versions", []):
+            info = {k: v for k, v in record.items() if k not in ("version", "sources", "good")}
+            for source in record.get("sources") or ["cache"]:
+                index.add(record["version"], source, record.get("good"), **info)
+        return index
+
+    def save(self, path=None):
+        """Persist the index to the local cache file"""
+        path = path or default_index_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        """Load the local cache file; an empty index if it is missing or unreadable"""
+        path = path or default_index_path()
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, "r") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Warning: Could not read version index cache {path}: {e}")
+            return cls()
+
+    def add_from_registry(self, model_name="iris_classifier"):
+        """Add versions tagged with a semver in the MLflow registry; skipped if MLflow is unavailable"""
+        if not os.getenv("MLFLOW_TRACKING_URI"):
+            return 0
+        try:
+            from mlflow_registry import get_client
+            model_versions = get_client().search_model_versions(f"name='{model_name}'")
+        except Exception as e:
+            print(f"⚠️ Warning: Could not read versions from the MLflow registry: {e}")
+            return 0
+
+        added = 0
+        for mv in model_versions:
+            tags = mv.tags or {}
+            if SEMVER_TAG in tags:
+                status = tags.get(STATUS_TAG)
+                good = True if status == "PASSED" else (False if status == "FAILED" else None)
+                self.add(tags[SEMVER_TAG], "registry", good, registry_version=str(mv.version))
+                added += 1
+        return added
+
+    def add_from_deployments(self, deployments):
+        """Add versions from SeldonDeployment `version` labels; ready deployments count as good"""
+        from kube_deploy import is_ready
+
+        added = 0
+        for obj in deployments:
+            metadata = obj.get("metadata", {})
+            version = metadata.get("labels", {}).get("version")
+            if version and self.add(version, "deployment", True if is_ready(obj) else None,
+                                    deployment=metadata.get("name")):
+                added += 1
+        return added
+
+
+def load_version_index(model_name="iris_classifier", registry=True, legacy_file=None):
+    """Build the index from the local cache, the legacy last_version.txt and the registry"""
+    index = VersionIndex.load()
+    legacy_file = legacy_file or workspace_path("last_version.txt")
+
+    if legacy_file and os.path.exists(legacy_file):
+        with open(legacy_file, "r") as f:
+            index.add(f.read().strip(), "last_version.txt")
+
+    if registry:
+        index.add_from_registry(model_name)
+    return index
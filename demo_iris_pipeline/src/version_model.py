@@ -1,31 +1,60 @@
+from profiling import StepProfiler
 import json
 import os
-import requests
-import semver
 from datetime import datetime
+from workspace import workspace_path
 
 def get_current_version():
-    """Get the current version from Git tags or start with v0.1.0"""
+    """Get the latest version from the version index (registry, cache, last_version.txt) or start with v0.1.0"""
     try:
-        # In a real scenario, you'd query Git tags or a version registry
-        # For demo, we'll simulate with a simple logic
+        from version_index import load_version_index
         
-        # Try to get last version from a hypothetical registry/git
-        # For now, we'll use a simple file-based approach
-        version_file = "/workspace/last_version.txt"
+        index = load_version_index()
+        latest = index.latest()
+        if latest:
+            print(f"📚 Version index: {len(index)} known versions, last known good: {index.last_known_good()}")
+            return latest
         
-        if os.path.exists(version_file):
-            with open(version_file, 'r') as f:
-                last_version = f.read().strip()
-            return last_version
-        else:
-            # Start with initial version
-            return "0.1.0"
+        # Start with initial version
+        return "0.1.0"
             
     except Exception as e:
         print(f"Warning: Could not determine current version: {e}")
         return "0.1.0"
 
+def record_version(version, validation_results, bumped=True):
+    """Record the new version in the local index cache and tag the registered model with it
+
+    Runs that did not earn a version bump (failed validation or low accuracy) leave the
+    existing version's index entry alone, and their model version is tagged with the
+    version they were compared against instead of its semver.
+    """
+    from version_index import VersionIndex, SEMVER_TAG, STATUS_TAG, BASE_SEMVER_TAG
+    
+    status = validation_results.get('validation_status', 'UNKNOWN')
+    
+    if bumped:
+        good = True if status == "PASSED" else (False if status == "FAILED" else None)
+        index = VersionIndex.load()
+        index.add(version, "pipeline", good)
+        index.save()
+    
+    model_info_path = workspace_path("model_info.json")
+    if not os.getenv("MLFLOW_TRACKING_URI") or not os.path.exists(model_info_path):
+        return
+    try:
+        from mlflow_registry import get_client
+        
+        with open(model_info_path, 'r') as f:
+            model_info = json.load(f)
+        client = get_client()
+        version_tag = SEMVER_TAG if bumped else BASE_SEMVER_TAG
+        client.set_model_version_tag(model_info['model_name'], model_info['model_version'], version_tag, version)
+        client.set_model_version_tag(model_info['model_name'], model_info['model_version'], STATUS_TAG, status)
+        print(f"🏷️ Tagged {model_info['model_name']} v{model_info['model_version']} with {version_tag}={version}")
+    except Exception as e:
+        print(f"⚠️ Warning: Could not tag model version in MLflow: {e}")
+
 def load_validation_results():
     """Load validation results from the validation step"""
     results_path = os.getenv("VALIDATION_RESULTS_PATH", "/workspace/validation_results.json")
@@ -35,6 +64,7 @@ def load_validation_results():
 
 def determine_version_bump(validation_results, current_version):
     """Determine what type of version bump is needed"""
+    import semver
     
     accuracy = validation_results.get('accuracy', 0.0)
     validation_status = validation_results.get('validation_status', 'FAILED')
@@ -117,12 +147,12 @@ def save_version_info(version, metadata):
         f.write(f"v{version}")  # Add 'v' prefix for container tags
     
     # Save complete metadata
-    metadata_path = "/workspace/model_metadata.json"
+    metadata_path = workspace_path("model_metadata.json")
     with open(metadata_path, 'w') as f:
         json.dump(metadata, f, indent=2)
     
-    # Save current version for next run
-    with open("/workspace/last_version.txt", 'w') as f:
+    # Save current version for next run (kept for compatibility; the version index is authoritative)
+    with open(workspace_path("last_version.txt"), 'w') as f:
         f.write(version)
     
     print(f"✅ Version information saved:")
@@ -133,20 +163,25 @@ def save_version_info(version, metadata):
 def main():
     """Main versioning logic"""
     print("🏷️ Starting Model Versioning...")
+    profiler = StepProfiler("version").start()
     
     try:
         # Load validation results
-        validation_results = load_validation_results()
+        with profiler.phase("load_results"):
+            validation_results = load_validation_results()
         print(f"✅ Loaded validation results")
         
         # Get current version
-        current_version = get_current_version()
+        with profiler.phase("lookup_version"):
+            current_version = get_current_version()
         print(f"📋 Current version: {current_version}")
         
         # Determine version bump
-        new_version = determine_version_bump(validation_results, current_version)
+        with profiler.phase("bump_version"):
+            new_version = determine_version_bump(validation_results, current_version)
+        bumped = new_version is not None
         
-        if new_version is None:
+        if not bumped:
             print("❌ No version bump - using current version")
             new_version = current_version
         else:
@@ -156,7 +191,9 @@ def main():
         metadata = create_model_metadata(validation_results, new_version)
         
         # Save version info
-        save_version_info(new_version, metadata)
+        with profiler.phase("save"):
+            save_version_info(new_version, metadata)
+            record_version(new_version, validation_results, bumped)
         
         print(f"\n🎉 Model versioning completed!")
         print(f"Version: {new_version}")
@@ -173,6 +210,9 @@ def main():
             f.write(f"v{fallback_version}")
         
         exit(1)
+    finally:
+        profiler.stop()
+        profiler.log_to_mlflow()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
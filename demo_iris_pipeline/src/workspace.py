@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Location of the shared workflow workspace
+
+On the cluster every step mounts the workdir PVC at /workspace; local_runner.py
+points WORKSPACE_DIR at its own state directory instead.
+"""
+
+import os
+
+DEFAULT_WORKSPACE_DIR = "/workspace"
+
+
+def workspace_dir():
+    """Shared workspace directory (WORKSPACE_DIR, default /workspace)"""
+    return os.getenv("WORKSPACE_DIR", DEFAULT_WORKSPACE_DIR)
+
+
+def workspace_path(*parts):
+    """Path of a file in the shared workspace"""
+    return os.path.join(workspace_dir(), *parts)
@@ -1,7 +1,11 @@
-import mlflow
-client = mlflow.tracking.MlflowClient()
-model = client.get_registered_model("iris_classifier")
-for mv in client.search_model_versions("name='iris_classifier'"):
-    if mv.current_stage == "Production":
-        print("Run ID:", mv.run_id)
-        print("Source:", mv.source)
\ No newline at end of file
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_iris_pipeline", "src"))
+import mlflow_registry as registry
+
+# One registry call for the Production version instead of listing every version
+mv = registry.find_production_version("iris_classifier")
+if mv is not None:
+    print("Run ID:", mv.run_id)
+    print("Source:", mv.source)
@@ -1,8 +1,14 @@
+import os
+import sys
 import mlflow
 import mlflow.sklearn
 from sklearn.datasets import load_iris
 from sklearn.ensemble import RandomForestClassifier
 
+# Reuse the pipeline's registry helpers (idempotent registration, shared client)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_iris_pipeline", "src"))
+import mlflow_registry as registry
+
 mlflow.set_tracking_uri("http://192.168.1.85:30800")
 mlflow.set_experiment("iris_demo")
 
@@ -10,9 +16,12 @@ with mlflow.start_run() as run:
     X, y = load_iris(return_X_y=True)
     clf = RandomForestClassifier()
     clf.fit(X, y)
-    mlflow.sklearn.log_model(
+    model_info = mlflow.sklearn.log_model(
         clf, 
-        "model", 
-        registered_model_name="iris_classifier"  # <-- This registers the model!
+        "model",
+        pip_requirements=mlflow.sklearn.get_default_pip_requirements(include_cloudpickle=True)
     )
-    print("Run ID:", run.info.run_id)
\ No newline at end of file
+    # Registers the model once per run; re-running against the same run is a no-op
+    model_version = registry.ensure_model_version("iris_classifier", model_info.model_uri, run.info.run_id)
+    print("Run ID:", run.info.run_id)
+    print("Model version:", model_version.version)
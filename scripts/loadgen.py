@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Load generator for the iris prediction server
+
+Drives serve.py (started locally with --start-server, or any http:// or
+https:// --url) over a pool of keep-alive HTTP/1.1 connections using asyncio
+streams only. Responses may be Content-Length or chunked; each request is
+bounded by --timeout and timeouts count as errors.
+
+    open-loop    requests arrive at --rate per second (fixed or Poisson spacing)
+                 regardless of how fast the server answers; latency is measured
+                 from each request's scheduled send time, so client-side queueing
+                 is not hidden (no coordinated omission)
+    closed-loop  --concurrency workers each send their next request as soon as
+                 the previous one completes
+
+Requests mix batch sizes (--batch-sizes 1:0.8,8:0.15,64:0.05) and take rows
+either from synthetic iris-like data or from captured traffic segments
+(--replay, see demo_iris_pipeline/src/capture.py). Results are printed and
+written as JSON (--output) for comparing model versions and server modes.
+
+    python scripts/loadgen.py --start-server --mode open --rate 200 --duration 20 \\
+        --output results/open-200.json
+"""
+
+import os
+import sys
+import json
+import time
+import ssl
+import random
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+from urllib.parse import urlsplit
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(PROJECT_ROOT, "demo_iris_pipeline", "src")
+
+# Per-class feature means and standard deviations of the iris dataset
+IRIS_STATS = [
+    ((5.006, 3.428, 1.462, 0.246), (0.352, 0.379, 0.174, 0.105)),
+    ((5.936, 2.770, 4.260, 1.326), (0.516, 0.314, 0.470, 0.198)),
+    ((6.588, 2.974, 5.552, 2.026), (0.636, 0.322, 0.552, 0.275)),
+]
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of integer microseconds (~1.6% relative error)"""
+
+    SUB_BITS = 6
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def _index(self, value):
+        if value < (1 << self.SUB_BITS):
+            return value
+        shift = value.bit_length() - self.SUB_BITS
+        return (shift << (self.SUB_BITS - 1)) + (value >> shift)
+
+    def _value(self, index):
+        """Midpoint of the value range covered by a bucket"""
+        half = 1 << (self.SUB_BITS - 1)
+        if index < (1 << self.SUB_BITS):
+            return index
+        shift = index // half - 1
+        mantissa = index - shift * half
+        return ((mantissa << shift) + ((mantissa + 1) << shift) - 1) // 2
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1e6))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        if not self.total:
+            return 0
+        target = max(1, int(round(self.total * percent / 100.0 + 0.4999)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._value(index), self.max)
+        return self.max
+
+    def summary(self):
+        """Latency summary in milliseconds"""
+        summary = {f"p{p:g}": round(self.percentile(p) / 1000.0, 3) for p in (50, 90, 95, 99, 99.9)}
+        summary["mean"] = round(self.sum / self.total / 1000.0, 3) if self.total else 0.0
+        summary["max"] = round(self.max / 1000.0, 3)
+        summary["count"] = self.total
+        return summary
+
+
+class HttpConnection:
+    """One keep-alive HTTP/1.1 connection, over TLS when given an SSL context"""
+
+    def __init__(self, host, port, ssl_context=None):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.reader = None
+        self.writer = None
+
+    async def _read_chunked(self):
+        """Body of a Transfer-Encoding: chunked response (chunk extensions and trailers ignored)"""
+        chunks = []
+        while True:
+            size_line = await self.reader.readline()
+            if not size_line:
+                raise asyncio.IncompleteReadError(b"".join(chunks), None)
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+    async def request(self, method, path, body=b"", headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl_context,
+                server_hostname=self.host if self.ssl_context else None)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 "Connection: keep-alive", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        length, chunked, keep_alive = None, False, True
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value.lower():
+                chunked = True
+            elif name == "connection" and value.lower() == "close":
+                keep_alive = False
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            payload = b""
+        elif chunked:
+            payload = await self._read_chunked()
+        elif length is not None:
+            payload = await self.reader.readexactly(length)
+        else:
+            # No framing: the body runs until the server closes the connection
+            payload, keep_alive = await self.reader.read(), False
+        if not keep_alive:
+            self.close()
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def tls_context(ca_file=None, insecure=False):
+    """Client SSL context: system trust store, or ca_file, or no verification at all"""
+    context = ssl.create_default_context(cafile=ca_file)
+    if insecure:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class ConnectionPool:
+    """Fixed-size pool of keep-alive connections; callers wait for a free one"""
+
+    DEFAULT_PORTS = {"http": 80, "https": 443}
+
+    def __init__(self, url, size, ssl_context=None):
+        parts = urlsplit(url)
+        if parts.scheme not in self.DEFAULT_PORTS:
+            raise ValueError(f"Unsupported URL scheme {parts.scheme!r} in {url}, expected http or https")
+        if parts.scheme == "https" and ssl_context is None:
+            ssl_context = tls_context()
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or self.DEFAULT_PORTS[parts.scheme]
+        self.base_path = parts.path.rstrip("/")
+        self.free = asyncio.Queue()
+        for _ in range(size):
+            self.free.put_nowait(HttpConnection(self.host, self.port,
+                                                ssl_context if parts.scheme == "https" else None))
+
+    async def request(self, method, path, body=b"", headers=None):
+        connection = await self.free.get()
+        try:
+            return await connection.request(method, self.base_path + path, body, headers)
+        except BaseException:
+            # Never reuse a connection left mid-response
+            connection.close()
+            raise
+        finally:
+            self.free.put_nowait(connection)
+
+    def close(self):
+        while not self.free.empty():
+            self.free.get_nowait().close()
+
+
+def parse_batch_sizes(spec):
+    """'1:0.8,8:0.2' -> ([1, 8], [0.8, 0.2])"""
+    sizes, weights = [], []
+    for item in spec.split(","):
+        size, _, weight = item.partition(":")
+        sizes.append(int(size))
+        weights.append(float(weight or 1))
+    return sizes, weights
+
+
+class RequestSource:
+    """Builds /predict payloads from synthetic or replayed rows"""
+
+    def __init__(self, batch_sizes, replay_dir=None, seed=42, variant=None):
+        self.sizes, self.weights = parse_batch_sizes(batch_sizes)
+        self.variant = variant
+        self.random = random.Random(seed)
+        self.rows = None
+        if replay_dir:
+            sys.path.insert(0, SRC_DIR)
+            from capture import load_segments
+            X, _ = load_segments(replay_dir)
+            if not len(X):
+                raise SystemExit(f"❌ No capture segments found in {replay_dir}")
+            self.rows = [[round(float(v), 3) for v in row] for row in X]
+
+    def _row(self):
+        if self.rows is not None:
+            return self.rows[self.random.randrange(len(self.rows))]
+        means, stds = IRIS_STATS[self.random.randrange(len(IRIS_STATS))]
+        return [round(max(0.1, self.random.gauss(m, s)), 1) for m, s in zip(means, stds)]
+
+    def next(self):
+        size = self.random.choices(self.sizes, self.weights)[0]
+        payload = {"instances": [self._row() for _ in range(size)]}
+        if self.variant:
+            payload["variant"] = self.variant
+        return size, json.dumps(payload).encode("utf-8")
+
+
+class LoadGenerator:
+    """Runs one open- or closed-loop load test and collects the results"""
+
+    def __init__(self, args):
+        self.args = args
+        self.source = RequestSource(args.batch_sizes, args.replay, args.seed, args.variant)
+        self.headers = {"Content-Type": "application/json"}
+        if args.priority:
+            self.headers["X-Priority"] = args.priority
+        self.ssl_context = tls_context(args.ca_file, args.insecure) if urlsplit(args.url).scheme == "https" else None
+        self.latency = LatencyHistogram()
+        self.service_latency = LatencyHistogram()
+        self.statuses = {}
+        self.errors = {}
+        self.requests = 0
+        self.rows = 0
+        self.dropped = 0
+        self.recording = False
+
+    async def _send(self, pool, scheduled=None):
+        size, body = self.source.next()
+        sent = time.perf_counter()
+        try:
+            # The timeout covers waiting for a pooled connection too: that is client-side queueing
+            status, _ = await asyncio.wait_for(pool.request("POST", "/predict", body, self.headers),
+                                               self.args.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            status = None
+            if self.recording:
+                name = "Timeout" if isinstance(e, asyncio.TimeoutError) else type(e).__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+        done = time.perf_counter()
+        if not self.recording:
+            return
+        self.requests += 1
+        if status is not None:
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if status == 200:
+            self.rows += size
+            self.service_latency.record(done - sent)
+            self.latency.record(done - (scheduled if scheduled is not None else sent))
+
+    async def _closed_loop(self, pool, deadline):
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self._send(pool)
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+    async def _open_loop(self, pool, deadline):
+        interval = 1.0 / self.args.rate
+        rng = random.Random(self.args.seed + 1)
+        pending = set()
+        next_send = time.perf_counter()
+        while next_send < deadline:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(pending) >= self.args.max_outstanding:
+                # The server has fallen too far behind; count instead of queueing without bound
+                if self.recording:
+                    self.dropped += 1
+            else:
+                task = asyncio.ensure_future(self._send(pool, scheduled=next_send))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            next_send += rng.expovariate(self.args.rate) if self.args.arrival == "poisson" else interval
+        if pending:
+            await asyncio.gather(*pending)
+
+    async def _phase(self, seconds):
+        pool = ConnectionPool(self.args.url, self.args.pool_size, self.ssl_context)
+        try:
+            deadline = time.perf_counter() + seconds
+            if self.args.mode == "open":
+                await self._open_loop(pool, deadline)
+            else:
+                await self._closed_loop(pool, deadline)
+        finally:
+            pool.close()
+
+    async def run(self):
+        if self.args.warmup > 0:
+            await self._phase(self.args.warmup)
+        self.recording = True
+        started = time.perf_counter()
+        await self._phase(self.args.duration)
+        elapsed = time.perf_counter() - started
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        ok = self.statuses.get("200", 0)
+        failed = self.requests - ok
+        return {
+            "label": self.args.label,
+            "url": self.args.url,
+            "mode": self.args.mode,
+            "rate": self.args.rate if self.args.mode == "open" else None,
+            "arrival": self.args.arrival if self.args.mode == "open" else None,
+            "concurrency": self.args.concurrency if self.args.mode == "closed" else None,
+            "pool_size": self.args.pool_size,
+            "timeout_seconds": self.args.timeout,
+            "batch_sizes": self.args.batch_sizes,
+            "source": f"replay:{self.args.replay}" if self.args.replay else "synthetic",
+            "priority": self.args.priority,
+            "variant": self.args.variant,
+            "duration_seconds": round(elapsed, 3),
+            "requests": self.requests,
+            "successful": ok,
+            "error_rate": round(failed / self.requests, 4) if self.requests else 0.0,
+            "statuses": self.statuses,
+            "errors": self.errors,
+            "client_dropped": self.dropped,
+            "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+            "rows_per_second": round(self.rows / elapsed, 2) if elapsed else 0.0,
+            # Open loop: from scheduled send time; closed loop: same as service latency
+            "latency_ms": self.latency.summary(),
+            "service_latency_ms": self.service_latency.summary(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        }
+
+
+def wait_healthy(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url.rstrip("/") + "/health", timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def start_server(args):
+    """Start serve.py on --url's port; returns the process"""
+    env = dict(os.environ, PORT=str(urlsplit(args.url).port or 8080), PYTHONWARNINGS="ignore")
+    if args.model_path:
+        env["MODEL_PATH"] = os.path.abspath(args.model_path)
+    process = subprocess.Popen([sys.executable, os.path.join(SRC_DIR, "serve.py")], cwd=SRC_DIR,
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_healthy(args.url):
+        process.terminate()
+        raise SystemExit(f"❌ serve.py did not become healthy at {args.url}")
+    return process
+
+
+def print_report(report):
+    latency = report["latency_ms"]
+    print(f"📊 {report['mode']}-loop: {report['requests']} requests in {report['duration_seconds']}s, "
+          f"{report['throughput_rps']} req/s, {report['rows_per_second']} rows/s")
+    print(f"   latency ms  p50 {latency['p50']}  p90 {latency['p90']}  p99 {latency['p99']}  "
+          f"p99.9 {latency['p99.9']}  max {latency['max']}")
+    print(f"   error rate {report['error_rate']:.2%}  statuses {report['statuses']}"
+          + (f"  errors {report['errors']}" if report["errors"] else "")
+          + (f"  client dropped {report['client_dropped']}" if report["client_dropped"] else ""))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load generator for the iris prediction server")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Server base URL (http:// or https://)")
+    parser.add_argument("--ca-file", help="https: CA bundle to verify the server certificate against")
+    parser.add_argument("--insecure", action="store_true", help="https: skip certificate verification")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--start-server", action="store_true", help="Start serve.py locally on the URL's port")
+    parser.add_argument("--model-path", help="MODEL_PATH for --start-server (default: serve.py's default)")
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed")
+    parser.add_argument("--rate", type=float, default=100.0, help="Open loop: requests per second")
+    parser.add_argument("--arrival", choices=["fixed", "poisson"], default="poisson", help="Open loop: arrival spacing")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed loop: concurrent workers")
+    parser.add_argument("--pool-size", type=int, default=32, help="Keep-alive connections")
+    parser.add_argument("--max-outstanding", type=int, default=10000, help="Open loop: cap on in-flight requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--batch-sizes", default="1:0.8,8:0.15,64:0.05", help="size:weight mix of rows per request")
+    parser.add_argument("--replay", help="Directory of capture segments to replay instead of synthetic rows")
+    parser.add_argument("--priority", help="X-Priority header (critical, normal, bulk)")
+    parser.add_argument("--variant", choices=["teacher", "student"], help="Model variant to request")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="", help="Free-form label stored in the results (e.g. model version)")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if urlsplit(args.url).scheme not in ConnectionPool.DEFAULT_PORTS:
+        parser.error(f"--url must be http:// or https://, got {args.url}")
+    server = start_server(args) if args.start_server else None
+    try:
+        report = asyncio.run(LoadGenerator(args).run())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
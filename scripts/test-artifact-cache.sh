@@ -0,0 +1,102 @@
+#!/bin/bash
+# Check the shared artifact cache: LRU eviction under a size limit, one
+# download for concurrent fetches of the same model URI, hit/miss accounting
+# and re-download of corrupt cached artifacts.
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+SRC_DIR="$PROJECT_ROOT/demo_iris_pipeline/src"
+WORK_DIR="$(mktemp -d /tmp/test-artifact-cache.XXXXXX)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+echo "🧪 Testing artifact cache..."
+
+python3 - "$SRC_DIR" "$WORK_DIR" << 'PYEOF'
+import os
+import sys
+import time
+import multiprocessing
+sys.path.insert(0, sys.argv[1])
+work_dir = sys.argv[2]
+from artifact_cache import ArtifactCache
+
+KB = 1024
+
+
+def downloader(content, log_path=None, delay=0.0):
+    """download_fn writing one file of `content` bytes, logging each call"""
+    def download(dst_dir):
+        time.sleep(delay)
+        if log_path:
+            with open(log_path, "a") as f:
+                f.write(f"{os.getpid()}\n")
+        path = os.path.join(dst_dir, "model")
+        os.makedirs(path)
+        with open(os.path.join(path, "model.pkl"), "wb") as f:
+            f.write(content)
+        return path
+    return download
+
+
+# 1. LRU eviction: A and B fit, touching A makes B the least recently used when C arrives
+cache = ArtifactCache(os.path.join(work_dir, "lru"), max_bytes=25 * KB)
+for uri, fill in (("runs:/a/model", b"a"), ("runs:/b/model", b"b")):
+    cache.fetch(uri, downloader(fill * 10 * KB))
+    time.sleep(0.01)
+cache.fetch("runs:/a/model", downloader(b"x"))
+time.sleep(0.01)
+cache.fetch("runs:/c/model", downloader(b"c" * 10 * KB))
+log_path = os.path.join(work_dir, "lru-downloads.log")
+cache.fetch("runs:/a/model", downloader(b"a" * 10 * KB, log_path))
+cache.fetch("runs:/c/model", downloader(b"c" * 10 * KB, log_path))
+assert not os.path.exists(log_path), "A or C was evicted instead of B"
+cache.fetch("runs:/b/model", downloader(b"b" * 10 * KB, log_path))
+assert open(log_path).read().count("\n") == 1, "B was not evicted"
+stats = cache.stats()
+assert stats["evictions"] == 2 and len(os.listdir(cache.objects_dir)) == 2, stats
+print(f"✅ least recently used artifact evicted first ({stats['evictions']} evictions)")
+
+# 2. Stats counters and hit rate
+assert (stats["hits"], stats["misses"]) == (3, 4), stats
+assert stats["bytes_downloaded"] == 40 * KB and stats["bytes_saved"] == 30 * KB, stats
+assert stats["hit_rate"] == round(3 / 7, 4), stats
+print(f"✅ stats: {stats['hits']} hits, {stats['misses']} misses, hit rate {stats['hit_rate']:.0%}")
+
+
+# 3. Concurrent fetches of one URI from separate processes download it once
+def fetch_shared(_):
+    shared = ArtifactCache(os.path.join(work_dir, "shared"))
+    path = shared.fetch("runs:/shared/model", downloader(b"s" * 50 * KB, shared_log, delay=0.2))
+    with open(os.path.join(path, "model.pkl"), "rb") as f:
+        return len(f.read())
+
+
+shared_log = os.path.join(work_dir, "shared-downloads.log")
+with multiprocessing.get_context("fork").Pool(6) as pool:
+    sizes = pool.map(fetch_shared, range(6))
+stats = ArtifactCache(os.path.join(work_dir, "shared")).stats()
+assert sizes == [50 * KB] * 6, sizes
+assert open(shared_log).read().count("\n") == 1 and (stats["misses"], stats["hits"]) == (1, 5), stats
+print("✅ 6 concurrent fetches, 1 download")
+
+# 4. Corrupt cached artifacts are detected and downloaded again
+cache = ArtifactCache(os.path.join(work_dir, "corrupt"))
+uri, content = "runs:/corrupt/model", b"m" * 10 * KB
+path = cache.fetch(uri, downloader(content))
+with open(os.path.join(path, "model.pkl"), "r+b") as f:
+    f.write(b"X")                      # same size, different bytes: caught by the first-hit checksum
+corrupt_log = os.path.join(work_dir, "corrupt-downloads.log")
+path = cache.fetch(uri, downloader(content, corrupt_log))
+assert open(os.path.join(path, "model.pkl"), "rb").read() == content
+cache.fetch(uri, downloader(content, corrupt_log))          # verified hit
+with open(os.path.join(path, "model.pkl"), "r+b") as f:
+    f.truncate(5 * KB)                 # truncated: caught by the size check on every hit
+path = cache.fetch(uri, downloader(content, corrupt_log))
+assert open(os.path.join(path, "model.pkl"), "rb").read() == content
+stats = cache.stats()
+assert open(corrupt_log).read().count("\n") == 2 and stats["corrupt"] == 2, stats
+print("✅ modified and truncated artifacts re-downloaded")
+PYEOF
+
+echo "✅ Artifact cache test completed"
@@ -0,0 +1,89 @@
+#!/bin/bash
+# Check the compacted forest predicts like the sklearn forest it was built from
+# and that the pickled model shrinks.
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+SRC_DIR="$PROJECT_ROOT/demo_iris_pipeline/src"
+
+echo "🧪 Testing forest compaction..."
+
+python3 - "$SRC_DIR" << 'EOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+import pickle
+import numpy as np
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from compact_forest import compact_forest, fidelity_sets
+from test_model import load_test_data, validate_compaction, validate_model_accuracy, validate_model_performance
+
+X, y = load_iris(return_X_y=True)
+X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+forest = RandomForestClassifier(n_estimators=100, random_state=42).fit(X_train, y_train)
+X_random = np.random.RandomState(0).uniform(0, 8, (2000, 4))
+
+# Tolerance 0 keeps every tree and only changes dtypes: probabilities match to float32 precision
+full, report = compact_forest(forest, X, X_random, tolerance=0.0)
+assert report["n_trees_after"] == 100 and report["fidelity"] == 1.0
+assert np.abs(forest.predict_proba(X_random) - full.predict_proba(X_random)).max() < 1e-6
+assert (forest.predict(X_random) == full.predict(X_random)).all()
+assert full.threshold_.dtype == np.float32 and full.feature_.dtype == np.int8
+print(f"✅ all trees: exact match, {report['bytes_before']} -> {report['bytes_after']} bytes")
+
+# Trees are selected on one row set and fidelity is measured on a disjoint probe set
+X_select, X_probe = fidelity_sets(X, augment=10, noise=0.1, seed=1)
+assert not (X_select[:, None, :] == X_probe[None, :, :]).all(axis=2).any()
+compact, report = compact_forest(forest, X_select, X_probe, tolerance=0.02, min_trees=5)
+assert report["n_trees_after"] < 100 and report["probe_rows"] == len(X_probe), report
+assert report["fidelity"] == np.mean(compact.predict(X_probe) == forest.predict(X_probe))
+validate_compaction(report)
+restored = pickle.loads(pickle.dumps(compact))
+assert (restored.predict(X_probe) == compact.predict(X_probe)).all()
+# Independent check on every iris row and on fresh jitter the selection never saw
+_, X_fresh = fidelity_sets(X, augment=10, noise=0.1, seed=7)
+for name, rows in (("iris", X), ("fresh jitter", X_fresh)):
+    agreement = np.mean(compact.predict(rows) == forest.predict(rows))
+    assert agreement >= 0.97, (name, agreement)
+print(f"✅ {report['n_trees_after']} trees kept, fidelity {report['fidelity']:.4f} on probe rows "
+      f"(selection {report['selection_fidelity']:.4f}), {report['latency_us_per_row_after']} µs/row")
+
+# The served model passes the same accuracy and per-class checks as the full forest
+X_test, y_test = load_test_data()
+validate_model_accuracy(compact, X_test, y_test)
+validate_model_performance(compact, X_test, y_test)
+
+# Inputs with the wrong number of features are rejected like sklearn does
+for bad in (np.ones((3, 5)), np.ones(3)):
+    try:
+        compact.predict(bad)
+        raise AssertionError(f"shape {bad.shape} accepted")
+    except ValueError:
+        pass
+print("✅ wrong feature count rejected")
+
+# The gate is not the selection's own stopping condition: probe disagreement reaches it
+assert report["fidelity"] < 1.0, report
+try:
+    validate_compaction(report, min_fidelity=1.0)
+    raise AssertionError("probe disagreement passed a strict gate")
+except ValueError:
+    print("✅ probe disagreement visible to the gate")
+
+# Depth-limited trees have sibling leaves that can be merged
+shallow = RandomForestClassifier(n_estimators=20, max_depth=2, random_state=0).fit(X, y)
+merged, report = compact_forest(shallow, X, X_random, tolerance=0.0, merge_tolerance=1.0)
+assert report["n_nodes_after"] < report["n_nodes_before"], report
+print(f"✅ leaf merging: {report['n_nodes_before']} -> {report['n_nodes_after']} nodes")
+
+# The gate rejects a compacted model that disagrees with the full forest
+try:
+    validate_compaction(dict(report, fidelity=0.9), min_fidelity=0.99)
+    raise AssertionError("low fidelity passed the gate")
+except ValueError:
+    print("✅ low fidelity rejected")
+EOF
+
+echo "✅ Forest compaction test completed"
@@ -0,0 +1,175 @@
+#!/bin/bash
+# Exercise deploy_model.py's in-process deploy engine (kube_deploy.py) against a
+# local fake Kubernetes API server: server-side apply, skip-on-unchanged-hash,
+# concurrent cleanup and watch-based readiness. No cluster or kubectl needed.
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+SRC_DIR="$PROJECT_ROOT/demo_iris_pipeline/src"
+
+echo "🧪 Testing deploy engine against a fake API server..."
+
+python3 - "$SRC_DIR" << 'EOF'
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, sys.argv[1])
+from kube_deploy import DeployEngine, KubeClient
+
+PREFIX = "/apis/machinelearning.seldon.io/v1/namespaces/"
+store = {}          # (namespace, name) -> object
+calls = []          # (method, name)
+lock = threading.Lock()
+resource_version = [0]
+READY_AFTER = 0.3   # seconds before the fake controller marks a deployment Available
+
+
+class FakeApi(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _parse(self):
+        url = urlparse(self.path)
+        parts = url.path[len(PREFIX):].split("/")
+        return parts[0], (parts[2] if len(parts) > 2 else None), parse_qs(url.query)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        namespace, name, query = self._parse()
+        if name:
+            calls.append(("GET", name))
+            obj = store.get((namespace, name))
+            return self._send(200, obj) if obj else self._send(404, {"reason": "NotFound"})
+
+        if query.get("watch") == ["true"]:
+            target = query["fieldSelector"][0].split("=", 1)[1]
+            calls.append(("WATCH", target))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            deadline = time.time() + float(query["timeoutSeconds"][0])
+            while time.time() < deadline:
+                obj = store.get((namespace, target))
+                if obj and obj["status"]["state"] == "Available":
+                    line = (json.dumps({"type": "MODIFIED", "object": obj}) + "\n").encode()
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    break
+                time.sleep(0.05)
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        calls.append(("LIST", namespace))
+        selector = dict(pair.split("=") for pair in query.get("labelSelector", [""])[0].split(",") if pair)
+        items = [
+            obj for (ns, _), obj in store.items()
+            if ns == namespace and all(obj["metadata"]["labels"].get(k) == v for k, v in selector.items())
+        ]
+        self._send(200, {"items": items})
+
+    def do_PATCH(self):
+        namespace, name, query = self._parse()
+        assert self.headers["Content-Type"] == "application/apply-patch+yaml"
+        assert query["fieldManager"] == ["iris-deploy"]
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        calls.append(("APPLY", name))
+        with lock:
+            resource_version[0] += 1
+            body["metadata"]["resourceVersion"] = str(resource_version[0])
+            body["status"] = {"state": "Creating"}
+            store[(namespace, name)] = body
+        threading.Timer(READY_AFTER, lambda: store[(namespace, name)]["status"].update(state="Available")).start()
+        self._send(200, body)
+
+    def do_DELETE(self):
+        namespace, name, _ = self._parse()
+        calls.append(("DELETE", name))
+        time.sleep(0.2)  # slow deletes make sequential vs concurrent cleanup visible
+        if store.pop((namespace, name), None) is None:
+            return self._send(404, {"reason": "NotFound"})
+        self._send(200, {"status": "Success"})
+
+
+def manifest(version):
+    name = f"iris-{version.replace('.', '-')}"
+    return {
+        "apiVersion": "machinelearning.seldon.io/v1",
+        "kind": "SeldonDeployment",
+        "metadata": {"name": name, "namespace": "iris-demo", "labels": {"app": "iris", "version": version}},
+        "spec": {"name": name, "predictors": []}
+    }
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), FakeApi)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+engine = DeployEngine(KubeClient(f"http://127.0.0.1:{server.server_port}"))
+
+# 1. First apply goes through server-side apply
+applied, _ = engine.apply(manifest("0.1.0"))
+assert applied and ("APPLY", "iris-0-1-0") in calls, calls
+print("✅ server-side apply")
+
+# 2. Same manifest again is skipped by hash
+calls.clear()
+applied, _ = engine.apply(manifest("0.1.0"))
+assert not applied and not any(c[0] == "APPLY" for c in calls), calls
+print("✅ unchanged manifest skipped")
+
+# 3. Readiness comes from the watch stream
+start = time.time()
+assert engine.wait_ready("iris-demo", "iris-0-1-0", timeout=10)
+engine.apply(manifest("0.2.0"))
+assert engine.wait_ready("iris-demo", "iris-0-2-0", timeout=10)
+assert ("WATCH", "iris-0-2-0") in calls, calls
+print(f"✅ watch-based readiness ({time.time() - start:.2f}s)")
+
+# 4. Old deployments are deleted concurrently
+for version in ("0.3.0", "0.4.0", "0.5.0", "0.6.0"):
+    engine.apply(manifest(version))
+names = ["iris-0-1-0", "iris-0-2-0", "iris-0-3-0", "iris-0-4-0"]
+start = time.time()
+deleted = engine.delete_many("iris-demo", names)
+elapsed = time.time() - start
+assert sorted(deleted) == names, deleted
+assert elapsed < 0.2 * len(names) * 0.75, f"deletes look sequential ({elapsed:.2f}s)"
+print(f"✅ concurrent cleanup of {len(deleted)} deployments ({elapsed:.2f}s)")
+
+# 5. A rollout that never becomes ready fails the deploy step
+import os
+import tempfile
+from unittest import mock
+import deploy_model
+
+class NeverReady(DeployEngine):
+    def wait_ready(self, namespace, name, timeout=300):
+        return False
+
+os.environ.update({"IMAGE_TAG": "ghcr.io/example/iris:0.7.0", "MODEL_VERSION": "0.7.0",
+                   "WORKSPACE_DIR": tempfile.mkdtemp(prefix="test-deploy-")})
+client = KubeClient(f"http://127.0.0.1:{server.server_port}")
+with mock.patch.object(deploy_model, "DeployEngine", lambda: NeverReady(client)):
+    try:
+        deploy_model.deploy_model()
+        raise AssertionError("unready deployment exited cleanly")
+    except SystemExit as e:
+        assert e.code == 1, e.code
+print("✅ unready rollout exits 1")
+
+server.shutdown()
+EOF
+
+echo "✅ Deploy engine test completed"
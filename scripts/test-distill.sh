@@ -0,0 +1,100 @@
+#!/bin/bash
+# Check the distilled student models: both kinds agree with the forest,
+# survive pickling, and single-row and batch predictions match.
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+SRC_DIR="$PROJECT_ROOT/demo_iris_pipeline/src"
+WORK_DIR="$(mktemp -d /tmp/test-distill.XXXXXX)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+echo "🧪 Testing knowledge distillation..."
+
+python3 - "$SRC_DIR" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+import pickle
+import numpy as np
+from sklearn.datasets import load_iris
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeRegressor
+from distill import distill, agreement, transfer_set, DistilledClassifier
+from test_model import load_test_data, validate_student
+
+X, y = load_iris(return_X_y=True)
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+teacher = RandomForestClassifier(n_estimators=100, random_state=42).fit(X_train, y_train)
+X_val, y_val = load_test_data()
+
+for kind in ("tree", "logistic"):
+    student = pickle.loads(pickle.dumps(distill(teacher, X_train, kind=kind)))
+    assert agreement(teacher, student, X) >= 0.95, (kind, agreement(teacher, student, X))
+    single = np.concatenate([student.predict(row.reshape(1, -1)) for row in X])
+    assert (single == student.predict(X)).all(), kind
+    assert np.allclose(student.predict_proba(X).sum(axis=1), 1.0, atol=1e-5)
+    try:
+        student.predict(np.ones((2, 5)))
+        raise AssertionError(f"{kind} student accepted 5 features")
+    except ValueError:
+        pass
+    results = validate_student(teacher, student, X_val, y_val)
+    assert results["speedup"] > 1, results
+    print(f"✅ {kind} student: agreement {results['agreement']:.3f}, {results['speedup']}x faster")
+
+# The NumPy tree walk reproduces the sklearn regressor it was built from
+X_transfer = transfer_set(X_train)
+regressor = DecisionTreeRegressor(max_depth=4, random_state=0).fit(X_transfer, teacher.predict_proba(X_transfer))
+student = DistilledClassifier.from_tree(regressor, teacher.classes_)
+X_random = np.random.RandomState(0).uniform(0, 8, (2000, 4))
+assert np.allclose(student.predict_proba(X_random), regressor.predict(X_random), atol=1e-6)
+print("✅ tree student matches sklearn on random inputs")
+
+try:
+    distill(teacher, X_train, kind="svm")
+    raise AssertionError("unknown student kind accepted")
+except ValueError:
+    print("✅ unknown student kind rejected")
+PYEOF
+
+# The registered student loads by its registry URI outside the src directory
+python3 - "$SRC_DIR" "$WORK_DIR" << 'PYEOF'
+import os
+import sys
+import subprocess
+import warnings
+sys.path.insert(0, sys.argv[1])
+work_dir = sys.argv[2]
+warnings.filterwarnings("ignore")
+os.environ["MLFLOW_TRACKING_URI"] = f"file://{work_dir}/mlruns"
+os.environ["DISTILL_STUDENT"] = "tree"
+import mlflow
+import mlflow.sklearn
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+import mlflow_registry as registry
+from train import distill_student
+
+X, y = load_iris(return_X_y=True)
+teacher = RandomForestClassifier(n_estimators=20, random_state=42).fit(X, y)
+with mlflow.start_run() as run:
+    teacher_info = mlflow.sklearn.log_model(teacher, "model")
+    teacher_version = registry.ensure_model_version("iris_classifier", teacher_info.model_uri, run.info.run_id)
+    student_info = distill_student(teacher, X, X, run.info.run_id, teacher_version.version)
+
+# Fresh interpreter, cwd outside src, nothing of the repo on sys.path
+load = (
+    "import warnings; warnings.filterwarnings('ignore')\n"
+    "import mlflow.sklearn, numpy as np\n"
+    f"model = mlflow.sklearn.load_model('models:/{student_info['model_name']}/{student_info['model_version']}')\n"
+    "print(type(model).__module__, model.predict(np.array([[5.1, 3.5, 1.4, 0.2]]))[0])\n"
+)
+env = {key: value for key, value in os.environ.items() if key != "PYTHONPATH"}
+result = subprocess.run([sys.executable, "-c", load], cwd=work_dir, env=env, capture_output=True, text=True)
+assert result.returncode == 0, result.stderr[-2000:]
+assert result.stdout.split()[-2:] == ["distill", "0"], result.stdout
+print(f"✅ student loads from the registry outside src: {result.stdout.strip()}")
+PYEOF
+
+echo "✅ Distillation test completed"
@@ -0,0 +1,86 @@
+#!/bin/bash
+# Measure interpreter import time for each iris_pipeline subcommand with
+# `python -X importtime` and fail if a subcommand pulls in heavy modules it
+# does not need (e.g. serve importing mlflow, version importing sklearn).
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+SRC_DIR="$PROJECT_ROOT/demo_iris_pipeline/src"
+WORK_DIR="$(mktemp -d /tmp/test-importtime.XXXXXX)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+echo "⏱️ Measuring import time per subcommand..."
+echo "   Source: $SRC_DIR"
+
+# serve.py loads the pickled model at import time, so give it a tiny one
+python3 - "$WORK_DIR/model.pkl" << 'EOF'
+import sys, pickle
+from sklearn.datasets import load_iris
+from sklearn.tree import DecisionTreeClassifier
+X, y = load_iris(return_X_y=True)
+with open(sys.argv[1], "wb") as f:
+    pickle.dump(DecisionTreeClassifier(max_depth=2).fit(X, y), f)
+EOF
+
+export MODEL_PATH="$WORK_DIR/model.pkl"
+
+python3 - "$SRC_DIR" << 'EOF'
+import os
+import sys
+import subprocess
+
+src_dir = sys.argv[1]
+
+# Top-level packages each subcommand must NOT import just to start up
+FORBIDDEN = {
+    "--help": {"mlflow", "sklearn", "numpy", "requests", "yaml", "fastapi"},
+    "train": {"mlflow", "sklearn"},
+    "validate": {"mlflow", "sklearn", "numpy"},
+    "version": {"mlflow", "sklearn", "numpy", "requests"},
+    "build": {"mlflow", "sklearn"},
+    "deploy": {"mlflow", "sklearn", "numpy"},
+    "monitor": {"mlflow", "sklearn", "numpy"},
+    "serve": {"mlflow", "boto3", "uvicorn"},
+}
+
+def measure(command):
+    """Import the subcommand's step module under -X importtime and parse the log"""
+    if command == "--help":
+        code = "import iris_pipeline"
+    else:
+        code = f"import iris_pipeline; iris_pipeline.load_command({command!r})"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=src_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"❌ {command}: import failed\n{result.stderr[-2000:]}")
+
+    packages, total_us = set(), 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        packages.add(name.strip().split(".")[0])
+        # Only count top-level imports; nested ones are already in their parent's cumulative time
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    return packages, total_us
+
+failures = []
+for command, forbidden in FORBIDDEN.items():
+    packages, total_us = measure(command)
+    leaked = sorted(packages & forbidden)
+    status = "✅" if not leaked else "❌"
+    print(f"   {status} {command:<9} {total_us / 1000:8.1f} ms  ({len(packages)} packages)")
+    if leaked:
+        failures.append(f"{command} imports {', '.join(leaked)}")
+
+if failures:
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1)
+EOF
+
+echo "✅ Import time test completed"
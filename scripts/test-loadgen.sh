@@ -0,0 +1,138 @@
+#!/bin/bash
+# Run the load generator briefly against a locally started serve.py in both
+# modes and check the JSON results, including 503s from load shedding.
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+WORK_DIR="$(mktemp -d /tmp/test-loadgen.XXXXXX)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+echo "🧪 Testing load generator..."
+
+# serve.py loads the pickled model at import time, so give it a tiny one
+python3 - "$WORK_DIR/model.pkl" << 'PYEOF'
+import sys, pickle
+from sklearn.datasets import load_iris
+from sklearn.tree import DecisionTreeClassifier
+X, y = load_iris(return_X_y=True)
+with open(sys.argv[1], "wb") as f:
+    pickle.dump(DecisionTreeClassifier(max_depth=2).fit(X, y), f)
+PYEOF
+
+LOADGEN="python3 $SCRIPT_DIR/loadgen.py --start-server --model-path $WORK_DIR/model.pkl --url http://127.0.0.1:18765 --duration 2 --warmup 0.5"
+
+$LOADGEN --mode closed --concurrency 4 --output "$WORK_DIR/closed.json"
+$LOADGEN --mode open --rate 100 --arrival fixed --batch-sizes 1:1 --output "$WORK_DIR/open.json"
+SERVE_MAX_CONCURRENCY=2 $LOADGEN --mode closed --concurrency 32 --priority bulk --output "$WORK_DIR/shed.json"
+
+python3 - "$WORK_DIR" << 'PYEOF'
+import sys, json, os
+load = lambda name: json.load(open(os.path.join(sys.argv[1], name)))
+
+closed, opened, shed = load("closed.json"), load("open.json"), load("shed.json")
+assert closed["successful"] > 0 and closed["error_rate"] == 0.0, closed
+assert closed["latency_ms"]["p50"] <= closed["latency_ms"]["p99"] <= closed["latency_ms"]["max"]
+print(f"✅ closed loop: {closed['throughput_rps']} req/s, p99 {closed['latency_ms']['p99']} ms")
+
+# Fixed arrivals at 100/s for 2s: about 200 requests, one row each
+assert 180 <= opened["requests"] <= 210 and opened["rows_per_second"] == opened["throughput_rps"], opened
+print(f"✅ open loop: {opened['requests']} requests at {opened['rate']}/s")
+
+assert shed["statuses"].get("503", 0) > 0 and shed["error_rate"] > 0, shed
+print(f"✅ shedding visible to the client: {shed['statuses']}")
+PYEOF
+
+# Protocol handling against in-process servers: chunked bodies on a kept-alive
+# connection, TLS, per-request timeouts and unsupported URL schemes
+openssl req -x509 -newkey rsa:2048 -nodes -days 1 -subj "/CN=127.0.0.1" \
+    -addext "subjectAltName=IP:127.0.0.1" -keyout "$WORK_DIR/key.pem" -out "$WORK_DIR/cert.pem" 2>/dev/null
+
+python3 - "$SCRIPT_DIR" "$WORK_DIR" << 'PYEOF'
+import os
+import ssl
+import sys
+import json
+import asyncio
+import threading
+sys.path.insert(0, sys.argv[1])
+work_dir = sys.argv[2]
+import loadgen
+
+connections = []
+BODY = json.dumps({"predictions": [0]}).encode()
+
+
+async def chunked_handler(reader, writer):
+    """Answers every request on the connection with a two-chunk body"""
+    connections.append(writer)
+    while True:
+        headers = b""
+        while not headers.endswith(b"\r\n\r\n"):
+            line = await reader.readline()
+            if not line:
+                writer.close()
+                return
+            headers += line
+        length = next((int(l.split(b":")[1]) for l in headers.split(b"\r\n") if l.lower().startswith(b"content-length")), 0)
+        await reader.readexactly(length)
+        half = len(BODY) // 2
+        writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                     + b"%x;ext=1\r\n%s\r\n" % (half, BODY[:half])
+                     + b"%x\r\n%s\r\n" % (len(BODY) - half, BODY[half:])
+                     + b"0\r\nX-Trailer: yes\r\n\r\n")
+        await writer.drain()
+
+
+async def hanging_handler(reader, writer):
+    await asyncio.sleep(3600)
+
+
+def serve_in_background(handler, ssl_context=None):
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handler, "127.0.0.1", 0, ssl=ssl_context))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1]
+
+
+tls = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+tls.load_cert_chain(os.path.join(work_dir, "cert.pem"), os.path.join(work_dir, "key.pem"))
+http_port = serve_in_background(chunked_handler)
+https_port = serve_in_background(chunked_handler, tls)
+hanging_port = serve_in_background(hanging_handler)
+
+
+async def three_requests(url, ssl_context=None):
+    pool = loadgen.ConnectionPool(url, 1, ssl_context)
+    try:
+        return [await pool.request("POST", "/predict", b"{}") for _ in range(3)]
+    finally:
+        pool.close()
+
+responses = asyncio.run(three_requests(f"http://127.0.0.1:{http_port}"))
+assert responses == [(200, BODY)] * 3 and len(connections) == 1, (responses, len(connections))
+print("✅ chunked responses decoded on one kept-alive connection")
+
+run = lambda *argv: loadgen.main(["--duration", "0.5", "--warmup", "0", "--concurrency", "2", *argv])
+report = run("--url", f"https://127.0.0.1:{https_port}", "--ca-file", os.path.join(work_dir, "cert.pem"))
+assert report["successful"] > 0 and report["error_rate"] == 0.0, report
+assert loadgen.ConnectionPool("https://example.com", 1).port == 443
+print(f"✅ https: {report['successful']} requests over verified TLS, default port 443")
+
+report = run("--url", f"https://127.0.0.1:{https_port}")
+assert report["successful"] == 0 and "SSLCertVerificationError" in report["errors"], report
+assert run("--url", f"https://127.0.0.1:{https_port}", "--insecure")["successful"] > 0
+print("✅ unverifiable certificates fail unless --ca-file/--insecure is given")
+
+report = run("--url", f"http://127.0.0.1:{hanging_port}", "--timeout", "0.1")
+assert report["successful"] == 0 and report["errors"].get("Timeout", 0) >= 4, report
+print(f"✅ {report['errors']['Timeout']} timeouts counted as errors")
+
+try:
+    loadgen.main(["--url", "ftp://127.0.0.1/"])
+    raise AssertionError("ftp:// accepted")
+except SystemExit as e:
+    assert e.code == 2
+print("✅ unsupported URL schemes rejected")
+PYEOF
+
+echo "✅ Load generator test completed"
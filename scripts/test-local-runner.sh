@@ -0,0 +1,163 @@
+#!/bin/bash
+# Check local_runner.py's scheduler and cache with fake steps: DAG ordering,
+# cache keys that follow code, params and data, downstream invalidation by
+# upstream output content, and the registry check that guards cached training.
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+SRC_DIR="$PROJECT_ROOT/demo_iris_pipeline/src"
+WORK_DIR="$(mktemp -d /tmp/test-local-runner.XXXXXX)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+echo "🧪 Testing local pipeline runner..."
+
+python3 - "$SRC_DIR" "$WORK_DIR" << 'PYEOF'
+import os
+import sys
+import json
+import time
+import threading
+import warnings
+from types import SimpleNamespace
+from unittest import mock
+sys.path.insert(0, sys.argv[1])
+src_dir, work_dir = sys.argv[1], sys.argv[2]
+warnings.filterwarnings("ignore")
+import local_runner
+from local_runner import LocalRunner, STEPS
+
+# The real graph: every dependency exists, it is acyclic and all hashed code files exist
+order, remaining = [], dict(STEPS)
+while remaining:
+    ready = [name for name, step in remaining.items() if all(dep in order for dep in step["deps"])]
+    assert ready, f"cycle or unknown dependency among {sorted(remaining)}"
+    order.extend(ready)
+    for name in ready:
+        del remaining[name]
+for name, step in STEPS.items():
+    for code_file in step.get("code", []):
+        assert os.path.exists(os.path.join(src_dir, code_file)), (name, code_file)
+assert "reuse_if" in STEPS["train"] and STEPS["train"].get("cache", True)
+print(f"✅ step graph is acyclic: {' -> '.join(order)}")
+
+# Fake steps: a -> (b, c) -> d, run by a stand-in for subprocess.run
+fake_src = os.path.join(work_dir, "src")
+os.makedirs(fake_src)
+for name in ("a", "b", "c", "iris_pipeline"):
+    with open(os.path.join(fake_src, f"{name}.py"), "w") as f:
+        f.write(f"# {name}\n")
+data_dir = os.path.join(work_dir, "data")
+os.makedirs(data_dir)
+reuse = {"a": True}
+
+steps = {
+    "a": {"command": "a", "deps": [], "code": ["a.py"], "params": ["PARAM_A"], "data": ["DATA_A"],
+          "outputs": ["a.txt"], "reuse_if": lambda runner, entry_dir: reuse["a"]},
+    "b": {"command": "b", "deps": ["a"], "code": ["b.py"], "params": [], "outputs": ["b.txt"]},
+    "c": {"command": "c", "deps": ["a"], "code": ["c.py"], "params": [], "outputs": ["c.txt"]},
+    "d": {"command": "d", "deps": ["b", "c"], "cache": False},
+}
+events, lock = [], threading.Lock()
+
+
+def fake_run(argv, cwd, env, stdout, stderr):
+    name = argv[-1]
+    with lock:
+        events.append(("start", name, time.perf_counter()))
+    time.sleep(0.2)
+    for output in steps[name].get("outputs", []):
+        with open(os.path.join(cwd, output), "w") as f:
+            f.write(env.get(f"OUT_{name.upper()}", "v1"))
+    with lock:
+        events.append(("end", name, time.perf_counter()))
+    return SimpleNamespace(returncode=0)
+
+
+def run():
+    events.clear()
+    runner = LocalRunner(os.path.join(work_dir, "state"), steps=steps)
+    with mock.patch.object(local_runner, "SRC_DIR", fake_src), \
+            mock.patch.object(local_runner.subprocess, "run", fake_run):
+        assert runner.run()
+    return {name: result["status"] for name, result in runner.results.items()}
+
+
+def at(kind, name):
+    return next(t for k, n, t in events if k == kind and n == name)
+
+
+os.environ.update({"DATA_A": data_dir, "PARAM_A": "1"})
+statuses = run()
+assert set(statuses.values()) == {"ran"}, statuses
+assert at("end", "a") <= min(at("start", "b"), at("start", "c"))
+assert max(at("end", "b"), at("end", "c")) <= at("start", "d")
+assert at("start", "b") < at("end", "c") and at("start", "c") < at("end", "b"), "b and c did not overlap"
+print("✅ dependencies run first, independent steps run concurrently")
+
+assert run() == {"a": "cached", "b": "cached", "c": "cached", "d": "ran"}
+print("✅ unchanged inputs restored from cache, uncacheable steps always run")
+
+with open(os.path.join(fake_src, "b.py"), "a") as f:
+    f.write("# changed\n")
+assert run() == {"a": "cached", "b": "ran", "c": "cached", "d": "ran"}
+print("✅ code change re-runs only that step")
+
+os.environ["PARAM_A"] = "2"
+assert run() == {"a": "ran", "b": "cached", "c": "cached", "d": "ran"}
+print("✅ param change re-runs the step; identical outputs keep downstream cached")
+
+os.environ["PARAM_A"], os.environ["OUT_A"] = "3", "v2"
+assert run() == {"a": "ran", "b": "ran", "c": "ran", "d": "ran"}
+print("✅ changed upstream outputs invalidate downstream steps")
+
+with open(os.path.join(data_dir, "segment.npz"), "w") as f:
+    f.write("rows")
+assert run()["a"] == "ran"
+print("✅ data change re-runs the step")
+
+reuse["a"] = False
+assert run()["a"] == "ran"
+reuse["a"] = True
+assert run()["a"] == "cached"
+print("✅ reuse_if can veto a cache hit")
+
+# The train guard against a real file-backed registry
+import mlflow
+import mlflow.sklearn
+from sklearn.datasets import load_iris
+from sklearn.tree import DecisionTreeClassifier
+import mlflow_registry as registry
+
+tracking_uri = "file://" + os.path.join(work_dir, "mlruns")
+mlflow.set_tracking_uri(tracking_uri)
+X, y = load_iris(return_X_y=True)
+client = registry.get_client(tracking_uri)
+client.create_registered_model("iris_classifier")
+
+
+def train_and_register(depth):
+    with mlflow.start_run() as run_:
+        info = mlflow.sklearn.log_model(DecisionTreeClassifier(max_depth=depth).fit(X, y), "model")
+    version = client.create_model_version("iris_classifier", info.model_uri, run_.info.run_id)
+    entry_dir = os.path.join(work_dir, f"entry-{version.version}")
+    os.makedirs(entry_dir)
+    with open(os.path.join(entry_dir, "model_info.json"), "w") as f:
+        json.dump({"model_name": "iris_classifier", "model_version": version.version,
+                   "run_id": run_.info.run_id}, f)
+    return entry_dir, version
+
+
+first_entry, first = train_and_register(1)
+assert not local_runner.registry_unchanged(tracking_uri, first_entry), "unpromoted version reused"
+client.transition_model_version_stage("iris_classifier", first.version, "Production")
+assert local_runner.registry_unchanged(tracking_uri, first_entry)
+second_entry, second = train_and_register(2)
+client.transition_model_version_stage("iris_classifier", second.version, "Production")
+assert not local_runner.registry_unchanged(tracking_uri, first_entry), "superseded training run reused"
+assert local_runner.registry_unchanged(tracking_uri, second_entry)
+assert not local_runner.registry_unchanged("file://" + os.path.join(work_dir, "empty"), second_entry)
+print("✅ cached training is only reused while its model version is still in Production")
+PYEOF
+
+echo "✅ Local runner test completed"
@@ -0,0 +1,86 @@
+#!/bin/bash
+# Check StepProfiler: phase timings, the JSON report layout, optional cProfile
+# output, no-op behaviour when disabled, and that failed steps keep a profile.
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+SRC_DIR="$PROJECT_ROOT/demo_iris_pipeline/src"
+WORK_DIR="$(mktemp -d /tmp/test-profiling.XXXXXX)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+echo "🧪 Testing step profiler..."
+
+python3 - "$SRC_DIR" "$WORK_DIR" << 'PYEOF'
+import os
+import sys
+import json
+import time
+sys.path.insert(0, sys.argv[1])
+work_dir = sys.argv[2]
+os.environ.update({"WORKSPACE_DIR": work_dir, "OUTPUT_DIR": work_dir})
+os.environ.pop("PIPELINE_PROFILE_DIR", None)
+from profiling import StepProfiler
+
+# Phase timings and report layout; the default output directory is $WORKSPACE_DIR/profiles
+profiler = StepProfiler("unit", enabled=True).start()
+with profiler.phase("sleep"):
+    time.sleep(0.05)
+with profiler.phase("allocate"):
+    block = bytearray(8 * 1024 * 1024)
+path = profiler.stop()
+assert path == os.path.join(work_dir, "profiles", "unit.json"), path
+with open(path) as f:
+    report = json.load(f)
+assert {"step", "timestamp", "host", "pid", "total_seconds", "peak_rss_mb",
+        "cpu_user_seconds", "cpu_system_seconds", "phases"} <= set(report), sorted(report)
+phases = {phase["name"]: phase for phase in report["phases"]}
+assert list(phases) == ["import", "sleep", "allocate"], list(phases)
+assert 0.05 <= phases["sleep"]["seconds"] < 1.0, phases["sleep"]
+assert phases["allocate"]["tracemalloc_peak_mb"] >= 7.5, phases["allocate"]
+assert report["total_seconds"] >= sum(p["seconds"] for p in report["phases"] if p["name"] != "import")
+assert not os.path.exists(os.path.join(work_dir, "profiles", "unit.prof"))
+print(f"✅ phases timed: sleep {phases['sleep']['seconds']:.3f}s, "
+      f"allocate peak {phases['allocate']['tracemalloc_peak_mb']} MiB; no .prof without cProfile")
+
+# cProfile stats are written only when asked for
+os.environ["PIPELINE_PROFILE_CPROFILE"] = "true"
+with StepProfiler("cprofiled", enabled=True) as profiler:
+    with profiler.phase("work"):
+        sum(i * i for i in range(10000))
+os.environ.pop("PIPELINE_PROFILE_CPROFILE")
+assert os.path.getsize(os.path.join(work_dir, "profiles", "cprofiled.prof")) > 0
+print("✅ cProfile stats written when PIPELINE_PROFILE_CPROFILE is set")
+
+# Errors inside the context manager are recorded
+try:
+    with StepProfiler("failing", enabled=True) as profiler:
+        raise RuntimeError("boom")
+except RuntimeError:
+    pass
+with open(os.path.join(work_dir, "profiles", "failing.json")) as f:
+    assert json.load(f)["phases"][-1] == {"name": "error", "error": "RuntimeError: boom"}
+print("✅ errors recorded in the report")
+
+# Disabled profilers are no-ops
+os.environ["PIPELINE_PROFILE"] = "false"
+profiler = StepProfiler("disabled").start()
+with profiler.phase("ignored"):
+    pass
+assert profiler.stop() is None and profiler.phases == []
+assert not os.path.exists(os.path.join(work_dir, "profiles", "disabled.json"))
+print("✅ disabled profiler writes nothing")
+
+# A failing build step still saves its profile
+os.environ["PIPELINE_PROFILE"] = "true"
+from prepare_build import prepare_model_for_build
+try:
+    prepare_model_for_build()               # no model_info.json in the workspace
+    raise AssertionError("build without model_info.json succeeded")
+except FileNotFoundError:
+    pass
+assert os.path.exists(os.path.join(work_dir, "profiles", "prepare_build.json"))
+print("✅ failed build step keeps its profile")
+PYEOF
+
+echo "✅ Profiler test completed"
@@ -0,0 +1,135 @@
+#!/bin/bash
+# Simulate many releases against a fake Pushgateway and check that
+# monitor_model.py's retention keeps the number of groups and series bounded,
+# retaining the newest versions by semver.
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+SRC_DIR="$PROJECT_ROOT/demo_iris_pipeline/src"
+DASHBOARD="$PROJECT_ROOT/monitoring/iris-mlops-dashboard.json"
+WORK_DIR="$(mktemp -d /tmp/test-pushgateway.XXXXXX)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+echo "🧪 Testing Pushgateway retention..."
+
+python3 - "$SRC_DIR" "$WORK_DIR" "$DASHBOARD" << 'EOF'
+import os
+import sys
+import json
+import base64
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, sys.argv[1])
+work_dir, dashboard_path = sys.argv[2], sys.argv[3]
+logging.disable(logging.INFO)
+
+
+class FakePushgateway(BaseHTTPRequestHandler):
+    """Groups keyed by their full label set; PUT replaces, POST merges, DELETE removes"""
+
+    groups = {}
+    bodies = []
+
+    def log_message(self, *args):
+        pass
+
+    def _labels(self):
+        parts = self.path.split("/metrics/", 1)[1].strip("/").split("/")
+        labels = {}
+        for name, value in zip(parts[::2], parts[1::2]):
+            if name.endswith("@base64"):
+                name, value = name[:-len("@base64")], base64.urlsafe_b64decode(value + "==").decode()
+            labels[name] = value
+        return tuple(sorted(labels.items()))
+
+    def _reply(self, status, body=b""):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _push(self, replace):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        FakePushgateway.bodies.append(body)
+        series = {line.split(" ")[0]: line.split(" ")[1] for line in body.splitlines() if line and not line.startswith("#")}
+        key = self._labels()
+        FakePushgateway.groups[key] = series if replace else {**FakePushgateway.groups.get(key, {}), **series}
+        self._reply(200)
+
+    def do_PUT(self):
+        self._push(replace=True)
+
+    def do_POST(self):
+        self._push(replace=False)
+
+    def do_DELETE(self):
+        FakePushgateway.groups.pop(self._labels(), None)
+        self._reply(202)
+
+    def do_GET(self):
+        data = [{"labels": dict(key)} for key in FakePushgateway.groups]
+        self._reply(200, json.dumps({"status": "success", "data": data}).encode())
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), FakePushgateway)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+validation_path = os.path.join(work_dir, "validation_results.json")
+with open(validation_path, "w") as f:
+    json.dump({"validation_status": "PASSED", "accuracy": 0.97}, f)
+os.environ.update({
+    "PUSHGATEWAY_URL": f"http://127.0.0.1:{server.server_port}",
+    "NAMESPACE": "argowf",
+    "MONITOR_RETAIN_VERSIONS": "5",
+    "VALIDATION_RESULTS_PATH": validation_path
+})
+import monitor_model
+
+# Another environment's groups are never touched by this pipeline's retention
+FakePushgateway.groups[(("environment", "prod"), ("job", "iris-mlops-pipeline"), ("stage", "deploy"), ("version", "0.1.0"))] = {"iris_model_accuracy": "1"}
+
+# 30 releases, each pushing from the validate and deploy stages
+releases = [f"0.{minor}.0" for minor in range(1, 31)]
+max_groups = max_series = 0
+for version in releases:
+    for stage in ("validate", "deploy"):
+        os.environ.update({"MODEL_VERSION": version, "PIPELINE_STAGE": stage})
+        monitor_model.export_metrics_to_pushgateway()
+        ours = [labels for labels in FakePushgateway.groups if ("environment", "argowf") in labels]
+        max_groups = max(max_groups, len(ours))
+        max_series = max(max_series, sum(len(FakePushgateway.groups[labels]) for labels in ours))
+
+ours = {dict(labels)["version"] for labels in FakePushgateway.groups if ("environment", "argowf") in labels}
+assert sorted(ours, key=lambda v: int(v.split(".")[1])) == ["0.26.0", "0.27.0", "0.28.0", "0.29.0", "0.30.0"], ours
+assert max_groups <= 2 * 6, max_groups                 # 5 retained versions + the one being pushed
+print(f"✅ {len(releases)} releases: at most {max_groups} groups / {max_series} series, kept {sorted(ours)}")
+assert any(("environment", "prod") in labels for labels in FakePushgateway.groups)
+print("✅ other environments untouched")
+
+# Pushing again for the same stage replaces the group instead of adding series
+before = sum(len(series) for series in FakePushgateway.groups.values())
+monitor_model.export_metrics_to_pushgateway()
+assert sum(len(series) for series in FakePushgateway.groups.values()) == before
+print("✅ re-push replaces the group")
+
+# The exposition carries no per-sample labels and still has the metrics the dashboard queries
+body = FakePushgateway.bodies[-1]
+samples = [line for line in body.splitlines() if line and not line.startswith("#")]
+assert all("{" not in line for line in samples), samples
+with open(dashboard_path) as f:
+    dashboard = f.read()
+for name in ("iris_model_accuracy", "iris_model_deployment_timestamp"):
+    assert name in dashboard and any(line.startswith(name + " ") for line in samples), name
+print(f"✅ {len(samples)} unlabelled samples per push, dashboard metrics present")
+
+# Semver ordering: 0.10.0 is newer than 0.9.0, junk versions go first
+groups = [{"version": v, "stage": "deploy"} for v in ("0.9.0", "0.10.0", "0.11.0", "unknown")]
+stale = monitor_model.select_stale_groups(groups, "0.11.0", retain=2)
+assert sorted(g["version"] for g in stale) == ["0.9.0", "unknown"], stale
+print("✅ semver ordering for retention")
+server.shutdown()
+EOF
+
+echo "✅ Pushgateway retention test completed"
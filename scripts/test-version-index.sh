@@ -0,0 +1,116 @@
+#!/bin/bash
+# Check semver ordering in the version index and deployment retention,
+# including double-digit versions (iris-0-10-0 must sort after iris-0-9-0).
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+SRC_DIR="$PROJECT_ROOT/demo_iris_pipeline/src"
+WORK_DIR="$(mktemp -d /tmp/test-version-index.XXXXXX)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+echo "🧪 Testing version index and deployment retention..."
+
+VERSION_INDEX_PATH="$WORK_DIR/version_index.json" python3 - "$SRC_DIR" << 'EOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+from version_index import VersionIndex
+from deploy_model import select_deployments_to_delete
+
+# Index with double-digit minors, a pre-release and a legacy v-prefixed entry
+index = VersionIndex()
+for minor in range(1, 13):
+    index.add(f"0.{minor}.0", "registry", good=(minor != 12))
+index.add("v1.0.0-rc.1", "deployment")
+index.add("not-a-version", "deployment")
+
+assert len(index) == 13, len(index)
+assert index.latest() == "1.0.0-rc.1", index.latest()
+assert index.newest(3) == ["1.0.0-rc.1", "0.12.0", "0.11.0"], index.newest(3)
+assert index.previous(3) == ["0.12.0", "0.11.0", "0.10.0"], index.previous(3)
+assert index.previous(2, before="0.10.0") == ["0.9.0", "0.8.0"], index.previous(2, before="0.10.0")
+assert index.last_known_good() == "0.11.0", index.last_known_good()
+assert index.last_known_good(before="0.10.0") == "0.9.0"
+print("✅ semver ordering, previous N and last known good")
+
+# Round trip through the local cache file
+index.save()
+reloaded = VersionIndex.load()
+assert reloaded.newest(13) == index.newest(13)
+assert reloaded.last_known_good() == "0.11.0"
+print("✅ local cache round trip")
+
+# Retention: string sorting would delete iris-0-10-0..iris-0-12-0 (the newest models)
+def deployment(version, ready=True):
+    return {
+        "metadata": {"name": f"iris-{version.replace('.', '-')}", "labels": {"app": "iris", "version": version}},
+        "status": {"state": "Available" if ready else "Creating"}
+    }
+
+deployments = [deployment(f"0.{minor}.0") for minor in range(1, 13)]
+deployments[-1]["status"]["state"] = "Creating"   # 0.12.0 is being rolled out
+to_delete = select_deployments_to_delete(deployments, "0.12.0", keep=3)
+kept = sorted({d["metadata"]["name"] for d in deployments} - set(to_delete))
+assert kept == ["iris-0-10-0", "iris-0-11-0", "iris-0-12-0"], kept
+assert "iris-0-9-0" in to_delete and "iris-0-1-0" in to_delete
+print(f"✅ retention keeps {kept}")
+
+# When the newest deployments are unhealthy, the last known good one survives
+deployments = [deployment("0.9.0"), deployment("0.10.0", False), deployment("0.11.0", False),
+               deployment("0.12.0", False), deployment("0.13.0", False)]
+to_delete = select_deployments_to_delete(deployments, "0.13.0", keep=3)
+assert to_delete == ["iris-0-10-0"], to_delete
+print("✅ last known good deployment retained")
+
+# A large index still answers lookups without re-sorting
+big = VersionIndex()
+for major in range(3):
+    for minor in range(40):
+        for patch in range(5):
+            big.add(f"{major}.{minor}.{patch}", "registry", good=(patch % 2 == 0))
+assert big.latest() == "2.39.4" and big.last_known_good() == "2.39.4"
+assert big.previous(2, before="1.10.0") == ["1.9.4", "1.9.3"]
+print(f"✅ {len(big)} versions indexed")
+EOF
+
+echo "🧪 Testing version recording for runs without a version bump..."
+
+WORKSPACE_DIR="$WORK_DIR" MLFLOW_TRACKING_URI="file://$WORK_DIR/mlruns" python3 - "$SRC_DIR" << 'EOF'
+import sys, json, os
+sys.path.insert(0, sys.argv[1])
+from mlflow.tracking import MlflowClient
+from version_index import VersionIndex, SEMVER_TAG, STATUS_TAG, BASE_SEMVER_TAG
+from version_model import record_version
+
+client = MlflowClient()
+client.create_registered_model("iris_classifier")
+
+def register_run():
+    mv = client.create_model_version("iris_classifier", "file:///tmp/unused")
+    with open(os.path.join(os.environ["WORKSPACE_DIR"], "model_info.json"), "w") as f:
+        json.dump({"model_name": "iris_classifier", "model_version": mv.version}, f)
+    return mv.version
+
+good_run = register_run()
+record_version("0.2.0", {"validation_status": "PASSED"}, bumped=True)
+failed_run = register_run()
+record_version("0.2.0", {"validation_status": "FAILED"}, bumped=False)
+
+# The failed run does not touch the existing version's health
+index = VersionIndex.load()
+assert index.last_known_good() == "0.2.0", index.to_dict()
+
+# Only the run that earned 0.2.0 carries its semver tag
+tags = client.get_model_version("iris_classifier", good_run).tags
+assert tags[SEMVER_TAG] == "0.2.0" and tags[STATUS_TAG] == "PASSED", tags
+tags = client.get_model_version("iris_classifier", failed_run).tags
+assert SEMVER_TAG not in tags, tags
+assert tags[BASE_SEMVER_TAG] == "0.2.0" and tags[STATUS_TAG] == "FAILED", tags
+
+registry_index = VersionIndex()
+assert registry_index.add_from_registry() == 1
+assert registry_index.last_known_good() == "0.2.0"
+print("✅ failed run keeps 0.2.0 good and is tagged base_semver")
+EOF
+
+echo "✅ Version index test completed"